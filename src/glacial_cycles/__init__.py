@@ -6,6 +6,14 @@ from . import models
 from . import simulation
 from . import plotting
 from . import utils
+from . import data
+from . import cli
+from . import analytics
+from . import store
+from . import animation
+from . import parallel
+from . import proxy
+from . import adjoint
 
-__all__ = ["models", "simulation", "plotting", "utils"]
+__all__ = ["models", "simulation", "plotting", "utils", "data", "cli", "analytics", "store", "animation", "parallel", "proxy", "adjoint"]
 
@@ -0,0 +1,226 @@
+"""
+Vectorized analytics of simulated glacial state sequences.
+
+All functions accept state arrays of shape (N, T) (one row per run, states as
+integer `GlacialState` values, as returned by `GlacialEnsemble`) or a single
+run of shape (T,). Ragged results (events per run) are returned as flat
+arrays together with the index of the run they belong to, so whole ensembles
+are processed without Python loops over members.
+
+Functions
+---------
+- run_lengths(states):
+    Run-length encoding of the state sequences.
+- transition_times(states, time=None, from_state=None, to_state=None):
+    Times of state transitions.
+- terminations(states, time=None):
+    Times of glacial terminations (FULL_GLACIAL → INTERGLACIAL).
+- state_occupancy(states, dt=1.0, time=None):
+    Time spent in each state.
+- cycle_lengths(states, time=None):
+    Durations of the intervals between consecutive terminations.
+- mean_cycle_length(states, time=None, start=None, end=None):
+    Mean cycle length per run within a time window.
+- regime_shift(states, time, split=-1000.0):
+    Mean cycle length before and after the Mid-Pleistocene Transition.
+"""
+from typing import Optional, Tuple, Union
+import numpy as np
+from .models.base import GlacialState
+
+StateLike = Union[np.ndarray, GlacialState]
+
+
+def _as_states(states) -> np.ndarray:
+    states = np.asarray(states)
+    if states.dtype == object:
+        states = np.vectorize(lambda s: s.value, otypes=[np.int8])(states)
+    return np.atleast_2d(states)
+
+
+def _as_time(time: Optional[np.ndarray], T: int) -> np.ndarray:
+    return np.arange(T, dtype=float) if time is None else np.asarray(time, dtype=float)
+
+
+def _value(state: Optional[StateLike]) -> Optional[int]:
+    return state.value if isinstance(state, GlacialState) else state
+
+
+def run_lengths(states) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run-length encode state sequences.
+
+    Parameters
+    ----------
+    - states : np.ndarray
+        States of shape (N, T) or (T,).
+
+    Returns
+    -------
+    - member : np.ndarray
+        Run index of each run of constant state.
+    - start : np.ndarray
+        Time index where the run starts.
+    - length : np.ndarray
+        Number of time steps in the run.
+    - value : np.ndarray
+        State value of the run.
+    """
+    states = _as_states(states)
+    N, T = states.shape
+    starts = np.ones((N, T), dtype=bool)
+    starts[:, 1:] = states[:, 1:] != states[:, :-1]
+    flat = np.flatnonzero(starts)
+    # every row starts a run at column 0, so runs never span two members
+    length = np.diff(np.append(flat, N * T))
+    return flat // T, flat % T, length, states.ravel()[flat]
+
+
+def transition_times(states, time: Optional[np.ndarray] = None, from_state: Optional[StateLike] = None, to_state: Optional[StateLike] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Times of state transitions, optionally filtered by origin and target state.
+
+    Parameters
+    ----------
+    - states : np.ndarray
+        States of shape (N, T) or (T,).
+    - time : np.ndarray, optional
+        Time axis of length T (default: time indices).
+    - from_state, to_state : GlacialState or int, optional
+        Only report transitions out of / into these states.
+
+    Returns
+    -------
+    - member : np.ndarray
+        Run index of each transition.
+    - time : np.ndarray
+        Time of the first step in the new state.
+    """
+    states = _as_states(states)
+    N, T = states.shape
+    mask = states[:, 1:] != states[:, :-1]
+    if from_state is not None:
+        mask &= states[:, :-1] == _value(from_state)
+    if to_state is not None:
+        mask &= states[:, 1:] == _value(to_state)
+    flat = np.flatnonzero(mask)
+    return flat // (T - 1), _as_time(time, T)[flat % (T - 1) + 1]
+
+
+def terminations(states, time: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Times of glacial terminations (FULL_GLACIAL → INTERGLACIAL), see `transition_times`."""
+    return transition_times(states, time, GlacialState.FULL_GLACIAL, GlacialState.INTERGLACIAL)
+
+
+def state_occupancy(states, dt: float = 1.0, time: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Time spent in each state.
+
+    Parameters
+    ----------
+    - states : np.ndarray
+        States of shape (N, T) or (T,).
+    - dt : float, optional
+        Uniform time step (default 1), used if `time` is not given.
+    - time : np.ndarray, optional
+        Time axis of length T, for non-uniform steps. Each state lasts until
+        the next time point; the last one lasts as long as the step before it.
+
+    Returns
+    -------
+    - np.ndarray
+        Array of shape (N, 3); column `s.value` holds the time spent in state `s`.
+    """
+    states = _as_states(states)
+    N, T = states.shape
+    idx = np.repeat(np.arange(N) * 3, T) + states.ravel()
+    if time is None:
+        return np.bincount(idx, minlength=3 * N).reshape(N, 3) * dt
+    steps = np.abs(np.diff(np.asarray(time, dtype=float)))
+    durations = np.append(steps, steps[-1:]) if T > 1 else np.full(T, dt)
+    return np.bincount(idx, weights=np.tile(durations, N), minlength=3 * N).reshape(N, 3)
+
+
+def cycle_lengths(states, time: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Durations of the intervals between consecutive terminations of each run.
+
+    Parameters
+    ----------
+    - states : np.ndarray
+        States of shape (N, T) or (T,).
+    - time : np.ndarray, optional
+        Time axis of length T (default: time indices).
+
+    Returns
+    -------
+    - member : np.ndarray
+        Run index of each cycle.
+    - end : np.ndarray
+        Time of the termination ending the cycle.
+    - length : np.ndarray
+        Cycle length (time between the two terminations).
+    """
+    member, t = terminations(states, time)
+    same = member[1:] == member[:-1]
+    return member[1:][same], t[1:][same], np.diff(t)[same]
+
+
+def mean_cycle_length(states, time: Optional[np.ndarray] = None, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """
+    Mean length of the cycles ending within `[start, end]`, per run.
+
+    Returns
+    -------
+    - np.ndarray
+        Array of shape (N,), NaN for runs without a complete cycle in the window.
+    """
+    N = _as_states(states).shape[0]
+    member, t_end, length = cycle_lengths(states, time)
+    keep = np.ones(len(member), dtype=bool)
+    if start is not None:
+        keep &= t_end >= start
+    if end is not None:
+        keep &= t_end <= end
+    return _member_mean(member[keep], length[keep], N)
+
+
+def _member_mean(member: np.ndarray, values: np.ndarray, N: int) -> np.ndarray:
+    """Mean of `values` per member, NaN for members without values."""
+    total = np.bincount(member, weights=values, minlength=N)
+    count = np.bincount(member, minlength=N)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+def regime_shift(states, time: np.ndarray, split: float = -1000.0) -> np.ndarray:
+    """
+    Mean cycle length before and after the Mid-Pleistocene Transition.
+
+    A run reproducing the MPT shows cycles of ~41 kyr before `split` and
+    ~100 kyr after it. Cycles are assigned by the time of the termination
+    ending them; a cycle ending exactly at `split` counts as "after".
+
+    Parameters
+    ----------
+    - states : np.ndarray
+        States of shape (N, T) or (T,).
+    - time : np.ndarray
+        Time axis of length T in kyr (required, since `split` is a time).
+    - split : float, optional
+        Time separating the two regimes (default -1000 kyr).
+
+    Returns
+    -------
+    - np.ndarray
+        Array of shape (N, 2) with the mean cycle length before and after `split`.
+    """
+    if time is None:
+        raise ValueError("regime_shift(): a time axis in kyr is required to place the split.")
+    N = _as_states(states).shape[0]
+    member, t_end, length = cycle_lengths(states, time)
+    before = t_end < split
+    return np.stack([
+        _member_mean(member[before], length[before], N),
+        _member_mean(member[~before], length[~before], N),
+    ], axis=1)
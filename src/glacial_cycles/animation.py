@@ -0,0 +1,291 @@
+"""
+Fast playback animations of glacial cycle simulations.
+
+The figure layouts of `glacial_cycles.plotting` are drawn once as a static
+background; every frame only restores that background and redraws the
+animated artists (a time cursor and the model traces up to the current time),
+i.e. blitting. Rendered frames are handed to background threads that pipe
+them to `ffmpeg` (video files) or write a PNG image sequence, and long
+series are decimated to the display resolution.
+
+Functions
+---------
+- decimate(x, y, n_bins):
+    Min/max decimation of a series for display.
+- animate_state_model(..., savepath):
+    Animate a glacial state model run (layout of `plot_state_model`).
+- animate_icevol_model(..., savepath):
+    Animate an ice volume model run (layout of `plot_icevol_model`).
+"""
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .models.base import GlacialState
+from .plotting import plot_icevol_model, plot_state_model
+
+VIDEO_SUFFIXES = (".mp4", ".mov", ".mkv", ".avi", ".webm", ".gif")
+"""File suffixes written through `ffmpeg`. A `.npy` path stores the raw RGBA
+frame stack of shape (n_frames, height, width, 4); any other path is a
+directory for a PNG sequence."""
+
+
+def _decimate_idx(y: np.ndarray, n_bins: int) -> np.ndarray:
+    """Indices of the min and max of each of `n_bins` bins, in time order."""
+    n = len(y)
+    if n <= 2 * n_bins:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_bins + 1).astype(int)
+    bins = np.repeat(np.arange(n_bins), np.diff(edges))
+    rank = np.arange(n)
+    i_lo = np.minimum.reduceat(np.where(y == np.minimum.reduceat(y, edges[:-1])[bins], rank, n), edges[:-1])
+    i_hi = np.minimum.reduceat(np.where(y == np.maximum.reduceat(y, edges[:-1])[bins], rank, n), edges[:-1])
+    return np.sort(np.stack([i_lo, i_hi], axis=1), axis=1).ravel()
+
+
+def decimate(x: np.ndarray, y: np.ndarray, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimate a series to at most `2 * n_bins` points, keeping the minimum and
+    maximum of each bin so the drawn line looks the same at display resolution.
+
+    Parameters
+    ----------
+    - x, y : np.ndarray
+        Series to decimate.
+    - n_bins : int
+        Number of bins, typically the axis width in pixels.
+
+    Returns
+    -------
+    - x, y : np.ndarray
+        Decimated series (unchanged if already short enough).
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    idx = _decimate_idx(y, n_bins)
+    return x[idx], y[idx]
+
+
+class _FrameWriter:
+    """
+    Background threads encoding RGBA frames to a video or PNG sequence.
+
+    Video frames are piped to one `ffmpeg` process in order, raw frames are
+    copied into a memory-mapped `.npy` stack, and PNG frames are compressed by
+    several threads in parallel (PIL releases the GIL).
+    """
+
+    def __init__(self, savepath: Path, size: Tuple[int, int], fps: int, n_frames: int):
+        self.savepath = savepath
+        self.frames: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=64)
+        self.errors: List[BaseException] = []
+        self.proc = self.stack = None
+        w, h = size
+        if savepath.suffix == ".npy":
+            self.stack = np.lib.format.open_memmap(savepath, mode="w+", dtype=np.uint8, shape=(n_frames, h, w, 4))
+            n_threads = 1
+        elif savepath.suffix in VIDEO_SUFFIXES:
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("Writing video requires ffmpeg on the PATH; use a directory or .npy path to write frames instead.")
+            self.proc = subprocess.Popen(
+                [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba",
+                 "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+                 "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", str(savepath)],
+                stdin=subprocess.PIPE,
+            )
+            n_threads = 1
+        else:
+            savepath.mkdir(parents=True, exist_ok=True)
+            n_threads = os.cpu_count() or 1
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(n_threads)]
+        for t in self.threads:
+            t.start()
+
+    def put(self, n: int, frame: np.ndarray) -> None:
+        self.frames.put((n, frame))
+
+    def _work(self) -> None:
+        from PIL import Image
+        while (item := self.frames.get()) is not None:
+            if self.errors:
+                continue  # keep draining so the producer never blocks
+            n, frame = item
+            try:
+                if self.stack is not None:
+                    self.stack[n] = frame
+                elif self.proc is not None:
+                    self.proc.stdin.write(frame.tobytes())
+                else:
+                    Image.fromarray(frame, "RGBA").save(self.savepath / f"frame_{n:06d}.png", compress_level=1)
+            except BaseException as e:  # re-raised in the main thread by close()
+                self.errors.append(e)
+
+    def close(self) -> None:
+        for _ in self.threads:
+            self.frames.put(None)
+        for t in self.threads:
+            t.join()
+        if self.stack is not None:
+            self.stack.flush()
+        if self.proc is not None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        if self.errors:
+            raise self.errors[0]
+        if self.proc is not None and self.proc.returncode:
+            raise RuntimeError(f"ffmpeg exited with code {self.proc.returncode}.")
+
+
+def _animate(fig, traces: Sequence[Tuple[object, np.ndarray, np.ndarray]], x: np.ndarray, savepath, n_frames: Optional[int], fps: int) -> Path:
+    """
+    Render the playback frames of a figure.
+
+    `traces` holds `(ax, x, y)` series revealed up to the current time; a
+    cursor is drawn at the current time in every axis.
+    """
+    savepath = Path(savepath)
+    canvas = FigureCanvasAgg(fig)
+    axes = fig.axes
+
+    animated = []
+    for ax, tx, ty in traces:
+        for line in ax.lines:  # fade the full static series to a preview
+            if len(line.get_ydata()) == len(ty) and np.array_equal(line.get_ydata(), ty):
+                line.set_alpha(0.25)
+        idx = _decimate_idx(ty, max(1, int(ax.bbox.width)))
+        (line,) = ax.plot(tx[idx[:1]], ty[idx[:1]], "k", animated=True)
+        animated.append((line, idx, tx[idx], ty[idx]))
+    cursors = [ax.axvline(x[0], color="tab:red", lw=0.8, animated=True) for ax in axes]
+
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    T = len(x)
+    frames = np.unique(np.linspace(0, T - 1, n_frames or T).round().astype(int))
+    renderer = canvas.get_renderer()
+    writer = None
+    try:
+        writer = _FrameWriter(savepath, canvas.get_width_height(), fps, len(frames))
+        # number of decimated points revealed in each frame
+        reveal = [np.searchsorted(idx, frames, side="right") for _, idx, _, _ in animated]
+        for n, k in enumerate(frames):
+            canvas.restore_region(background)
+            for (line, _, dx, dy), m in zip(animated, reveal):
+                line.set_data(dx[:m[n]], dy[:m[n]])
+                line.draw(renderer)
+            for cursor in cursors:
+                cursor.set_xdata([x[k], x[k]])
+                cursor.draw(renderer)
+            writer.put(n, np.asarray(canvas.buffer_rgba()).copy())
+    finally:
+        if writer is not None:
+            writer.close()
+        plt.close(fig)
+    return savepath
+
+
+def animate_state_model(
+    time: np.ndarray,
+    insolation: np.ndarray,
+    states: List[GlacialState],
+    i0: float,
+    i1: float,
+    i3: float,
+    *,
+    savepath,
+    n_frames: Optional[int] = None,
+    fps: int = 30,
+    figsize: Tuple[float, float] = (7, 5),
+    dpi: int = 100,
+    **plot_kwargs,
+) -> Path:
+    """
+    Animate a glacial state model run in the layout of `plot_state_model`.
+
+    Parameters
+    ----------
+    - time, insolation, states, i0, i1, i3 :
+        As in `plot_state_model`.
+    - savepath : str or Path
+        Video file (suffix in `VIDEO_SUFFIXES`, requires ffmpeg), `.npy` file
+        for the raw frame stack, or directory for a PNG frame sequence.
+    - n_frames : int, optional
+        Number of frames (default: one per time step).
+    - fps : int, optional
+        Frames per second of the video (default 30).
+    - figsize, dpi : optional
+        Frame size.
+    - **plot_kwargs :
+        Further arguments of `plot_state_model` (proxy records, title).
+
+    Returns
+    -------
+    - Path
+        `savepath`.
+    """
+    fig, axs = plot_state_model(time, insolation, states, i0, i1, i3, **plot_kwargs)
+    fig.set_size_inches(figsize)
+    fig.set_dpi(dpi)
+    fig.tight_layout()
+    x = -np.asarray(time, dtype=float)
+    traces = [
+        (axs[0], x, np.asarray(insolation, dtype=float)),
+        (axs[1], x, np.array([s.value for s in states], dtype=float)),
+    ]
+    return _animate(fig, traces, x, savepath, n_frames, fps)
+
+
+def animate_icevol_model(
+    time: np.ndarray,
+    insolation: np.ndarray,
+    forcing: np.ndarray,
+    ice_volume: List[float],
+    states: List[GlacialState],
+    vR: np.ndarray,
+    *,
+    savepath,
+    n_frames: Optional[int] = None,
+    fps: int = 30,
+    figsize: Tuple[float, float] = (7, 5),
+    dpi: int = 100,
+    **plot_kwargs,
+) -> Path:
+    """
+    Animate an ice volume model run in the layout of `plot_icevol_model`.
+
+    Parameters
+    ----------
+    - time, insolation, forcing, ice_volume, states, vR :
+        As in `plot_icevol_model`.
+    - savepath : str or Path
+        Video file (suffix in `VIDEO_SUFFIXES`, requires ffmpeg), `.npy` file
+        for the raw frame stack, or directory for a PNG frame sequence.
+    - n_frames : int, optional
+        Number of frames (default: one per time step).
+    - fps : int, optional
+        Frames per second of the video (default 30).
+    - figsize, dpi : optional
+        Frame size.
+    - **plot_kwargs :
+        Further arguments of `plot_icevol_model` (proxy records, title).
+
+    Returns
+    -------
+    - Path
+        `savepath`.
+    """
+    fig, axs = plot_icevol_model(time, insolation, forcing, ice_volume, states, vR, **plot_kwargs)
+    fig.set_size_inches(figsize)
+    fig.set_dpi(dpi)
+    fig.tight_layout()
+    x = -np.asarray(time, dtype=float)
+    traces = [
+        (axs[0], x, np.asarray(forcing, dtype=float)),
+        (axs[1], x, np.asarray(ice_volume, dtype=float)),
+    ]
+    return _animate(fig, traces, x, savepath, n_frames, fps)
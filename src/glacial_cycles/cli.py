@@ -0,0 +1,272 @@
+"""
+Command-line batch runner for glacial cycle experiments.
+
+Experiments are described in a JSON or TOML file and run non-interactively:
+
+    python -m glacial_cycles experiments.toml --workers 8
+
+Config format
+-------------
+A file holds a single experiment table or a list of them under
+`experiments` (JSON) / `[[experiment]]` (TOML). Each experiment has:
+
+- **name** : str
+    Used for output file names.
+- **model** : str
+    Registered model name, see `glacial_cycles.models.registry`.
+- **dataset** : table
+    `source` ("laskar", "berger" or a path) and optional `data_dir`.
+- **window** : table, optional
+    `start` and `end` in kyr (negative in the past).
+- **preprocessing** : table, optional
+    `normalize` (default true) normalizes the insolation; `truncate = a`
+    applies `f(x, a)` and normalizes again (the ice volume forcing).
+- **params** : table, optional
+    Fixed model parameters. `state` is given by name, e.g. "MILD_GLACIAL".
+- **grid** : table, optional
+    Lists of values per parameter; the full Cartesian product is run.
+- **outputs** : table, optional
+    `directory` (default "results"), `figures` (default false) and
+    `proxies` (e.g. ["LR04", "EDC"]) shown in the figures.
+
+Results are written per experiment as `<directory>/<name>.npz` with one array
+per column: `time`, `insolation`, `forcing`, one `(N, T)` array per model
+output (states as integer values) and one `param_<key>` array per grid key.
+"""
+import argparse
+import itertools
+import json
+import os
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    tomllib = None
+
+import numpy as np
+
+from .data import load_orbital, load_proxy, select_window
+from .models.base import GlacialState
+from .models.registry import get_model
+from .simulation import GlacialEnsemble
+from .utils import f, normalize
+
+
+def load_config(path: os.PathLike) -> List[Dict[str, Any]]:
+    """
+    Read an experiment config file.
+
+    Parameters
+    ----------
+    - path : path-like
+        `.json` or `.toml` file.
+
+    Returns
+    -------
+    - list of dict
+        One dict per experiment.
+    """
+    path = Path(path)
+    if path.suffix == ".toml":
+        if tomllib is None:
+            raise RuntimeError("TOML configs require Python >= 3.11 (tomllib).")
+        with open(path, "rb") as fh:
+            config = tomllib.load(fh)
+    elif path.suffix == ".json":
+        with open(path) as fh:
+            config = json.load(fh)
+    else:
+        raise ValueError(f"Unsupported config format '{path.suffix}', expected .json or .toml.")
+
+    experiments = config.get("experiments", config.get("experiment", config))
+    if isinstance(experiments, dict):
+        experiments = [experiments]
+    for i, exp in enumerate(experiments):
+        exp.setdefault("name", f"{path.stem}_{i}")
+        if "model" not in exp or "dataset" not in exp:
+            raise ValueError(f"Experiment '{exp['name']}' needs both a 'model' and a 'dataset' entry.")
+    return experiments
+
+
+def expand_grid(params: Dict[str, Any], grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand fixed parameters and a parameter grid into a list of parameter sets.
+
+    Parameters
+    ----------
+    - params : dict
+        Parameters shared by all runs.
+    - grid : dict
+        Lists of values per parameter.
+
+    Returns
+    -------
+    - list of dict
+        One parameter dict per point in the Cartesian product of `grid`.
+    """
+    keys = list(grid)
+    return [{**params, **dict(zip(keys, values))} for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _model_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert config values to the types expected by the model constructors."""
+    out = dict(params)
+    if isinstance(out.get("state"), str):
+        out["state"] = GlacialState[out["state"]]
+    if "v" in out:
+        out["v"] = float(out["v"])
+    if "state_params" in out:
+        out["state_params"] = np.asarray(out["state_params"], dtype=float)
+    return out
+
+
+def prepare_forcing(exp: Dict[str, Any]):
+    """
+    Load, window and preprocess the forcing of an experiment.
+
+    Returns
+    -------
+    - time, insolation, forcing : np.ndarray
+        Time axis, (normalized) insolation and the model forcing.
+    """
+    dataset = exp["dataset"]
+    time, insolation = load_orbital(dataset["source"], dataset.get("data_dir"))
+    window = exp.get("window", {})
+    time, insolation = select_window(time, insolation, start=window.get("start"), end=window.get("end"))
+
+    pre = exp.get("preprocessing", {})
+    if pre.get("normalize", True):
+        insolation = normalize(insolation)
+    forcing = insolation
+    if pre.get("truncate") is not None:
+        forcing = normalize(f(insolation, a=pre["truncate"]))
+    return time, insolation, forcing
+
+
+def run_param_sets(model_name: str, time: np.ndarray, forcing: np.ndarray, param_sets: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Simulate one ensemble member per parameter set.
+
+    Returns
+    -------
+    - dict of np.ndarray
+        One `(N, T)` array per model output; states are stored as integers.
+    """
+    return GlacialEnsemble(model_name, [_model_params(p) for p in param_sets], time, forcing).run()
+
+
+def _write_figures(exp, outdir, time, insolation, forcing, columns, param_sets) -> None:
+    import matplotlib.pyplot as plt
+    from .plotting import plot_icevol_model, plot_state_model
+
+    window = exp.get("window", {})
+    proxies = {}
+    for name in exp.get("outputs", {}).get("proxies", []):
+        ptime, piso = load_proxy(name, exp["dataset"].get("data_dir"))
+        proxies[f"{name}_time"], proxies[f"{name}_iso"] = select_window(
+            ptime, piso, start=window.get("start"), end=window.get("end")
+        )
+
+    model_cls = get_model(exp["model"])
+    for n, params in enumerate(param_sets):
+        model = model_cls(**_model_params(params))
+        states = [GlacialState(int(s)) for s in columns["state"][n]]
+        title = f"{exp['name']} #{n}"
+        if "ice_volume" in columns:
+            fig, _ = plot_icevol_model(
+                time, insolation, forcing, columns["ice_volume"][n], states,
+                vR=model.state_params[:, 1], title=title, **proxies,
+            )
+        else:
+            fig, _ = plot_state_model(
+                time, forcing, states, model.i0, model.i1, model.i3, title=title, **proxies,
+            )
+        fig.savefig(outdir / f"{exp['name']}_{n}.png", dpi=150)
+        plt.close(fig)
+
+
+def run_experiment(exp: Dict[str, Any], workers: Optional[int] = None, output_dir: Optional[os.PathLike] = None, figures: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Run one experiment and write its results.
+
+    Parameters
+    ----------
+    - exp : dict
+        Experiment description (see module docs).
+    - workers : int, optional
+        Number of worker processes (default: number of local cores).
+    - output_dir : path-like, optional
+        Overrides `outputs.directory`.
+    - figures : bool, optional
+        Overrides `outputs.figures`.
+
+    Returns
+    -------
+    - dict
+        Timing summary with keys `name`, `runs`, `steps` and `seconds`.
+    """
+    start = timer.perf_counter()
+    get_model(exp["model"])
+    outputs = exp.get("outputs", {})
+    outdir = Path(output_dir or outputs.get("directory", "results"))
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    time, insolation, forcing = prepare_forcing(exp)
+    grid = exp.get("grid", {})
+    param_sets = expand_grid(exp.get("params", {}), grid)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(param_sets)))
+    if workers == 1:
+        columns = run_param_sets(exp["model"], time, forcing, param_sets)
+    else:
+        chunks = [param_sets[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run_param_sets, itertools.repeat(exp["model"]), itertools.repeat(time), itertools.repeat(forcing), chunks))
+        # undo the round-robin chunking so rows follow `param_sets`
+        order = np.argsort(np.concatenate([np.arange(len(param_sets))[i::workers] for i in range(workers)]))
+        columns = {key: np.concatenate([p[key] for p in parts])[order] for key in parts[0]}
+
+    np.savez(
+        outdir / f"{exp['name']}.npz",
+        time=time,
+        insolation=insolation,
+        forcing=forcing,
+        **columns,
+        **{f"param_{key}": np.array([p[key] for p in param_sets]) for key in grid},
+    )
+    if outputs.get("figures", False) if figures is None else figures:
+        _write_figures(exp, outdir, time, insolation, forcing, columns, param_sets)
+
+    return {"name": exp["name"], "runs": len(param_sets), "steps": len(time), "seconds": timer.perf_counter() - start}
+
+
+def print_summary(timings: List[Dict[str, Any]]) -> None:
+    """Print a per-experiment timing table."""
+    print(f"{'experiment':<30}{'runs':>8}{'steps':>8}{'time [s]':>11}{'runs/s':>10}")
+    for t in timings:
+        rate = t["runs"] / t["seconds"] if t["seconds"] > 0 else float("inf")
+        print(f"{t['name']:<30}{t['runs']:>8}{t['steps']:>8}{t['seconds']:>11.2f}{rate:>10.1f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point of the `glacial-cycles` command."""
+    parser = argparse.ArgumentParser(prog="glacial-cycles", description="Run glacial cycle experiments from config files.")
+    parser.add_argument("configs", nargs="+", help="JSON or TOML experiment files.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("-o", "--output-dir", default=None, help="Override the output directory of every experiment.")
+    parser.add_argument("--figures", action=argparse.BooleanOptionalAction, default=None, help="Force figures on/off.")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    timings = []
+    for path in args.configs:
+        for exp in load_config(path):
+            timings.append(run_experiment(exp, args.workers, args.output_dir, args.figures))
+    print_summary(timings)
+    return 0
@@ -0,0 +1,123 @@
+"""
+Loaders for the orbital forcing and proxy records shipped in `data/`.
+
+Functions
+---------
+- load_orbital(source, data_dir=None):
+    Load an orbital solution (time and 65°N summer insolation).
+- load_proxy(name, data_dir=None):
+    Load a δ18O proxy record (time and isotope values).
+- select_window(time, *arrays, start=None, end=None):
+    Slice time series to a time window.
+
+Notes
+-----
+All times are returned in kyr relative to present, negative in the past,
+matching the convention used in the notebooks.
+"""
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+"""Default location of the data files (the repository `data/` directory)."""
+
+ORBITAL_FILES: Dict[str, str] = {
+    "laskar": "laskar_orbital_data.txt",
+    "berger": "berger_orbital_data.txt",
+}
+"""File names of the bundled orbital solutions."""
+
+PROXY_FILES: Dict[str, str] = {
+    "LR04": "LR04record.txt",
+    "EDC": "EDCrecord.txt",
+}
+"""File names of the bundled proxy records."""
+
+PathLike = Union[str, Path]
+
+
+def _resolve(name: PathLike, files: Dict[str, str], data_dir: Optional[PathLike]) -> Tuple[str, Path]:
+    key = str(name)
+    if key in files:
+        return key, Path(data_dir or DATA_DIR) / files[key]
+    path = Path(key)
+    for known, fname in files.items():
+        if path.name == fname:
+            return known, path
+    raise ValueError(f"Unknown data source '{name}', expected one of {sorted(files)} or a path to one of their files.")
+
+
+def load_orbital(source: PathLike, data_dir: Optional[PathLike] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load orbital insolation data.
+
+    Parameters
+    ----------
+    - source : str or Path
+        "laskar", "berger", or a path to one of the bundled files.
+    - data_dir : str or Path, optional
+        Directory holding the data files (default `DATA_DIR`).
+
+    Returns
+    -------
+    - time : np.ndarray
+        Time in kyr (increasing, ending at present).
+    - insolation : np.ndarray
+        Summer insolation at 65°N in W/m².
+    """
+    kind, path = _resolve(source, ORBITAL_FILES, data_dir)
+    if kind == "berger":
+        data = np.genfromtxt(path, skip_header=2)[::-1]
+        return data[:, 0], data[:, 5]
+    data = np.genfromtxt(path)
+    return data[:, 0], data[:, 4]
+
+
+def load_proxy(name: PathLike, data_dir: Optional[PathLike] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load a δ18O proxy record.
+
+    Parameters
+    ----------
+    - name : str or Path
+        "LR04", "EDC", or a path to one of the bundled files.
+    - data_dir : str or Path, optional
+        Directory holding the data files (default `DATA_DIR`).
+
+    Returns
+    -------
+    - time : np.ndarray
+        Time in kyr (negative in the past).
+    - iso : np.ndarray
+        Isotope values.
+    """
+    _, path = _resolve(name, PROXY_FILES, data_dir)
+    data = np.genfromtxt(path, dtype=float)
+    return -data[:, 0] / 1000, data[:, 1]
+
+
+def select_window(time: np.ndarray, *arrays: np.ndarray, start: Optional[float] = None, end: Optional[float] = None):
+    """
+    Slice a time axis and matching arrays to `start <= time <= end`.
+
+    Parameters
+    ----------
+    - time : np.ndarray
+        Time axis.
+    - *arrays : np.ndarray
+        Arrays aligned with `time`.
+    - start, end : float, optional
+        Window bounds in kyr (open-ended if omitted).
+
+    Returns
+    -------
+    - tuple of np.ndarray
+        The sliced time axis followed by the sliced arrays.
+    """
+    mask = np.ones(len(time), dtype=bool)
+    if start is not None:
+        mask &= time >= start
+    if end is not None:
+        mask &= time <= end
+    return (time[mask],) + tuple(np.asarray(a)[mask] for a in arrays)
@@ -5,16 +5,21 @@ This subpackage includes:
 - BaseGlacialModel: abstract base class
 - GlacialIceVolumeModel: Paillard-style ice volume model
 - GlacialStateModel: Paillard-style state-transition model
+- register_model / get_model: registry of models selectable by name
 """
 
 from .base import BaseGlacialModel, GlacialState
 from .ice_volume import GlacialIceVolumeModel
 from .state import GlacialStateModel
+from .registry import MODEL_REGISTRY, register_model, get_model
 
 __all__ = [
     "BaseGlacialModel",
     "GlacialState",
     "GlacialIceVolumeModel",
     "GlacialStateModel",
+    "MODEL_REGISTRY",
+    "register_model",
+    "get_model",
 ]
 
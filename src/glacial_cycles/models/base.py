@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, ClassVar, Mapping, Sequence, Tuple
+import numpy as np
+from ..utils import RK4_step
 
 class GlacialState(Enum):
     """
@@ -35,12 +37,33 @@ class BaseGlacialModel(ABC):
     - `get_data`
     - `set_state`
 
+    Models may additionally implement the optional **batch interface**, which
+    advances N parameter sets at once on array-valued state:
+    - `batch_init` (required): build the batch from N parameter dicts.
+    - `batch_rhs`: vectorized right-hand side of the `batch_variables`.
+    - `batch_transition`: vectorized state transitions.
+    - `output_schema`: outputs of `batch_outputs` and their dtypes.
+
+    The default `batch_step` integrates `batch_variables` with RK4 using
+    `batch_rhs` and then applies `batch_transition`; models with special
+    integration needs override `batch_step` itself. Engines such as
+    `glacial_cycles.simulation.GlacialEnsemble` use the batch interface
+    whenever `supports_batch()` is true.
+
     Properties
     ----------
     state : GlacialState
         The current glacial state (read-only).
     """
 
+    output_schema: ClassVar[Dict[str, Any]] = {"state": np.int8}
+    """Names and dtypes of the outputs returned by `batch_outputs`."""
+    batch_variables: ClassVar[Tuple[str, ...]] = ()
+    """Continuous batch variables integrated by the default `batch_step`."""
+    batch_settings: ClassVar[Tuple[str, ...]] = ()
+    """Model attributes that must be the same for all members of a batch;
+    engines run members with different settings as separate batches."""
+
     @property
     @abstractmethod
     def state(self) -> GlacialState:
@@ -64,3 +87,84 @@ class BaseGlacialModel(ABC):
     def get_data(self) -> Dict[str, Any]:
         """Return the current state and any additional outputs."""
         pass
+
+    @classmethod
+    def supports_batch(cls) -> bool:
+        """Whether the model implements the batch interface."""
+        return cls.batch_init.__func__ is not BaseGlacialModel.batch_init.__func__
+
+    @classmethod
+    def batch_init(cls, params: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Build the batch state of N models.
+
+        Parameters
+        ----------
+        - params : sequence of dict
+            Constructor keyword arguments of each member.
+
+        Returns
+        -------
+        - batch : dict of np.ndarray
+            Parameters and state variables as arrays with leading axis N.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not implement the batch interface.")
+
+    @classmethod
+    def batch_rhs(cls, y: np.ndarray, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any]) -> np.ndarray:
+        """
+        Time derivative of the `batch_variables`.
+
+        Parameters
+        ----------
+        - y : np.ndarray
+            Stacked batch variables, shape (len(batch_variables), N).
+        - batch : dict of np.ndarray
+            Batch state.
+        - forcing : dict
+            Forcing at this step; values are scalars or arrays of shape (N,).
+
+        Returns
+        -------
+        - np.ndarray
+            dy/dt with the shape of `y`.
+        """
+        raise NotImplementedError(f"{cls.__name__} has no continuous batch variables.")
+
+    @classmethod
+    def batch_transition(cls, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any], dt: float) -> None:
+        """Apply state transitions to the batch in place (default: none)."""
+        pass
+
+    @classmethod
+    def batch_step(cls, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any], dt: float = 1) -> Dict[str, np.ndarray]:
+        """
+        Advance all members of the batch one time step.
+
+        Parameters
+        ----------
+        - batch : dict of np.ndarray
+            Batch state, updated in place.
+        - forcing : dict
+            Forcing at this step (`insolation`, `insolation_previous`,
+            `insolation_previous_peak`); scalars or arrays of shape (N,).
+        - dt : float, optional
+            Step length (default 1).
+
+        Returns
+        -------
+        - dict of np.ndarray
+            Outputs after the step, see `batch_outputs`.
+        """
+        if cls.batch_variables:
+            y = np.stack([batch[k] for k in cls.batch_variables])
+            y = RK4_step(lambda y, t: cls.batch_rhs(y, batch, forcing), y, t=0, dt=dt)
+            for k, row in zip(cls.batch_variables, y):
+                batch[k] = row
+        cls.batch_transition(batch, forcing, dt)
+        return cls.batch_outputs(batch)
+
+    @classmethod
+    def batch_outputs(cls, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Return the current outputs of all members, keyed as in `output_schema`."""
+        return {key: batch[key] for key in cls.output_schema}
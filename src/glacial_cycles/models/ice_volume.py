@@ -1,8 +1,36 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional, Sequence
 import numpy as np
+from scipy.optimize import brentq
 from .base import BaseGlacialModel, GlacialState
+from .registry import register_model
 from ..utils import ice_vol_diff, RK4_step
 
+
+def _integrate(dvdt, v, dt: float, n: int):
+    """Integrate over `dt` with `n` equal RK4 steps (elementwise for arrays)."""
+    h = dt / n
+    for _ in range(n):
+        v = RK4_step(dvdt, v, t=0, dt=h)
+    return v
+
+
+def _controlled_substeps(dvdt, v, dt: float, n: int, tol: float, max_doublings: int = 16) -> int:
+    """
+    Number of sub-steps meeting `tol`, by step doubling.
+
+    Starting from `n`, the number of sub-steps is doubled until the ice volume
+    after `dt` changes by at most `tol` (for all members of an array) when it
+    is doubled once more.
+    """
+    coarse = _integrate(dvdt, v, dt, n)
+    for _ in range(max_doublings):
+        fine = _integrate(dvdt, v, dt, 2 * n)
+        if np.max(np.abs(fine - coarse)) <= tol:
+            break
+        n, coarse = 2 * n, fine
+    return n
+
+@register_model("ice_volume")
 class GlacialIceVolumeModel(BaseGlacialModel):
     """
     Glacial cycle model with explicit ice volume dynamics (Paillard, 1998).
@@ -15,8 +43,24 @@ class GlacialIceVolumeModel(BaseGlacialModel):
     - Insolation forcing should be preprocessed before input:
         - Truncate with `f(x) = 0.5 [x + sqrt(4a² + x²)]` and normalize.
     - Dynamics are integrated using a 4th-order Runge–Kutta (RK4) scheme.
+    - Steps of arbitrary length `dt` are split into equal RK4 sub-steps no
+      longer than `max_substep`. With `substep_tol`, the number of sub-steps
+      is error controlled: it is doubled until doubling it again changes the
+      ice volume at the end of the step by at most `substep_tol` (estimated
+      for the state at the start of the step). Without either option a step
+      is a single RK4 step, as before.
+    - With `locate_crossings`, the v = vmax crossing is located inside the
+      sub-step by root finding, so the MILD_GLACIAL → FULL_GLACIAL switch
+      does not depend on the step length.
+    - Implements the batch interface; `max_substep`, `substep_tol` and
+      `locate_crossings` must be the same for all members of a batch
+      (`batch_settings`, ensembles are split accordingly), and the number of
+      sub-steps is chosen for the least accurate member.
     """
 
+    output_schema = {"state": np.int8, "ice_volume": np.float64}
+    batch_settings = ("max_substep", "substep_tol", "locate_crossings")
+
     i0: float
     """Insolation threshold for INTERGLACIAL → MILD_GLACIAL transition (default=-0.75)."""
     i1: float
@@ -33,6 +77,14 @@ class GlacialIceVolumeModel(BaseGlacialModel):
     """Relaxation timescale (set by state if not provided)."""
     v: float
     """Current ice volume."""
+    max_substep: Optional[float]
+    """Longest internal RK4 step; longer steps are split into equal sub-steps (default=None, one RK4 step per step)."""
+    substep_tol: Optional[float]
+    """Absolute ice volume tolerance of the error-controlled sub-stepping (default=None, no error control)."""
+    locate_crossings: bool
+    """Switch to FULL_GLACIAL at the located v = vmax crossing instead of at the end of the step (default=False)."""
+    trace: Optional[list]
+    """If a list, every RK4 step appends `(state value, insolation, step length, v at its start)` (default=None)."""
 
     @property
     def state(self) -> GlacialState:
@@ -50,6 +102,10 @@ class GlacialIceVolumeModel(BaseGlacialModel):
         self.vR = params.get("vR")
         self.τR = params.get("τR")
         self.v = params.get("v", 0.5)
+        self.max_substep = params.get("max_substep")
+        self.substep_tol = params.get("substep_tol")
+        self.locate_crossings = params.get("locate_crossings", False)
+        self.trace = None
         self.set_state(params.get("state", GlacialState.INTERGLACIAL))
 
         if not isinstance(self.v, float):
@@ -86,6 +142,8 @@ class GlacialIceVolumeModel(BaseGlacialModel):
         ----------
         - insolation : float
             Insolation forcing at this step (passed via kwargs).
+        - dt : float, optional
+            Step length (default 1). The forcing is held constant over the step.
 
         Returns
         -------
@@ -93,11 +151,131 @@ class GlacialIceVolumeModel(BaseGlacialModel):
             Current state and ice volume.
         """
         insolation = kwargs["insolation"]
-        dvdt = ice_vol_diff(insolation, self.vR, self.τR, self.τF)
-        self.v = RK4_step(dvdt, self.v, t=0, dt=1)
+        dt = kwargs.get("dt", 1)
+        n = 1 if self.max_substep is None else max(1, int(np.ceil(dt / self.max_substep)))
+        if self.substep_tol is not None:
+            dvdt = ice_vol_diff(insolation, self.vR, self.τR, self.τF)
+            n = _controlled_substeps(dvdt, self.v, dt, n, self.substep_tol)
+        h = dt / n
+
+        for _ in range(n):
+            dvdt = ice_vol_diff(insolation, self.vR, self.τR, self.τF)
+            v = RK4_step(dvdt, self.v, t=0, dt=h)
+            if self.locate_crossings and self.state == GlacialState.MILD_GLACIAL and max(self.v, v) > self.vmax:
+                θ = self.crossing_time(dvdt, h)
+                if self.trace is not None:
+                    self.trace.append((self.state.value, insolation, θ, self.v))
+                self.v = RK4_step(dvdt, self.v, t=0, dt=θ)
+                self.set_state(GlacialState.FULL_GLACIAL)
+                dvdt = ice_vol_diff(insolation, self.vR, self.τR, self.τF)
+                if self.trace is not None:
+                    self.trace.append((self.state.value, insolation, h - θ, self.v))
+                v = RK4_step(dvdt, self.v, t=0, dt=h - θ)
+            elif self.trace is not None:
+                self.trace.append((self.state.value, insolation, h, self.v))
+            self.v = v
+
         self.update_state(insolation)
         return self.get_data()
 
+    def crossing_time(self, dvdt, h: float) -> float:
+        """
+        Locate the time within an RK4 step at which the ice volume reaches `vmax`.
+
+        Parameters
+        ----------
+        - dvdt : callable
+            Differential function of the current state.
+        - h : float
+            Step length; the crossing must lie in `[0, h]`.
+
+        Returns
+        -------
+        - float
+            Time after the start of the step at which v = vmax (0 if already above).
+        """
+        if self.v >= self.vmax:
+            return 0.0
+        return brentq(lambda s: RK4_step(dvdt, self.v, t=0, dt=s) - self.vmax, 0.0, h, xtol=1e-12)
+
+    @classmethod
+    def batch_init(cls, params: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+        """Build the batch state of N models (see `BaseGlacialModel.batch_init`)."""
+        models = [cls(**p) for p in params]
+        for name in cls.batch_settings:
+            if len({getattr(m, name) for m in models}) > 1:
+                raise ValueError(f"GlacialIceVolumeModel.batch_init(): '{name}' must be the same for all members.")
+        batch = {
+            name: np.array([getattr(m, name) for m in models], dtype=float)
+            for name in ("i0", "i1", "τF", "vmax", "v")
+        }
+        batch["state_params"] = np.stack([np.asarray(m.state_params, dtype=float) for m in models])
+        batch["state"] = np.array([m.state.value for m in models], dtype=np.int8)
+        batch["max_substep"] = models[0].max_substep
+        batch["substep_tol"] = models[0].substep_tol
+        batch["locate_crossings"] = models[0].locate_crossings
+        return batch
+
+    @staticmethod
+    def _batch_relaxation(batch: Dict[str, np.ndarray]):
+        """State-dependent `(τR, vR)` arrays of the batch."""
+        sp = batch["state_params"][np.arange(len(batch["state"])), batch["state"]]
+        return sp[:, 0], sp[:, 1]
+
+    @classmethod
+    def batch_step(cls, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any], dt: float = 1) -> Dict[str, np.ndarray]:
+        """Vectorized `step`, including sub-stepping and located crossings."""
+        F = forcing["insolation"]
+        n = 1 if batch["max_substep"] is None else max(1, int(np.ceil(dt / batch["max_substep"])))
+        if batch["substep_tol"] is not None:
+            τR, vR = cls._batch_relaxation(batch)
+            n = _controlled_substeps(ice_vol_diff(F, vR, τR, batch["τF"]), batch["v"], dt, n, batch["substep_tol"])
+        h = dt / n
+
+        for _ in range(n):
+            τR, vR = cls._batch_relaxation(batch)
+            v = batch["v"]
+            dvdt = ice_vol_diff(F, vR, τR, batch["τF"])
+            v_next = RK4_step(dvdt, v, t=0, dt=h)
+            if batch["locate_crossings"]:
+                hit = (batch["state"] == GlacialState.MILD_GLACIAL.value) & (np.maximum(v, v_next) > batch["vmax"])
+                if hit.any():
+                    θ = cls._batch_crossing_time(dvdt, v, batch["vmax"], h)
+                    v_cross = RK4_step(dvdt, v, t=0, dt=θ)
+                    batch["state"][hit] = GlacialState.FULL_GLACIAL.value
+                    τR, vR = cls._batch_relaxation(batch)
+                    dvdt = ice_vol_diff(F, vR, τR, batch["τF"])
+                    v_next = np.where(hit, RK4_step(dvdt, v_cross, t=0, dt=h - θ), v_next)
+            batch["v"] = v_next
+
+        cls.batch_transition(batch, forcing, dt)
+        return cls.batch_outputs(batch)
+
+    @staticmethod
+    def _batch_crossing_time(dvdt, v: np.ndarray, vmax: np.ndarray, h: float, iterations: int = 60) -> np.ndarray:
+        """Vectorized `crossing_time` by bisection (meaningful where the step crosses `vmax`)."""
+        lo, hi = np.zeros_like(v), np.full_like(v, h)
+        for _ in range(iterations):
+            mid = 0.5 * (lo + hi)
+            above = RK4_step(dvdt, v, t=0, dt=mid) > vmax
+            hi = np.where(above, mid, hi)
+            lo = np.where(above, lo, mid)
+        return np.where(v >= vmax, 0.0, hi)
+
+    @classmethod
+    def batch_transition(cls, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any], dt: float) -> None:
+        """Vectorized `update_state`."""
+        F, s = forcing["insolation"], batch["state"].copy()
+        I, g, G = (GlacialState.INTERGLACIAL.value, GlacialState.MILD_GLACIAL.value, GlacialState.FULL_GLACIAL.value)
+        batch["state"][(s == I) & (F < batch["i0"])] = g
+        batch["state"][(s == g) & (batch["v"] > batch["vmax"])] = G
+        batch["state"][(s == G) & (F > batch["i1"])] = I
+
+    @classmethod
+    def batch_outputs(cls, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Current states and ice volumes of all members."""
+        return {"state": batch["state"].copy(), "ice_volume": batch["v"].copy()}
+
     def get_data(self) -> Dict[str, Any]:
         """Return current state and ice volume."""
         return {"state": self.state, "ice_volume": self.v}
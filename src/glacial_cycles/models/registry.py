@@ -0,0 +1,43 @@
+"""
+Registry of glacial models selectable by name.
+
+Models register themselves with the `register_model` decorator; configs and
+engines look them up with `get_model`.
+"""
+from typing import Callable, Dict, Type
+from .base import BaseGlacialModel
+
+MODEL_REGISTRY: Dict[str, Type[BaseGlacialModel]] = {}
+"""Registered model classes by name."""
+
+
+def register_model(name: str) -> Callable[[Type[BaseGlacialModel]], Type[BaseGlacialModel]]:
+    """
+    Class decorator registering a model under `name`.
+
+    Parameters
+    ----------
+    - name : str
+        Name used to select the model, e.g. in experiment configs.
+    """
+    def decorator(cls: Type[BaseGlacialModel]) -> Type[BaseGlacialModel]:
+        if name in MODEL_REGISTRY and MODEL_REGISTRY[name] is not cls:
+            raise ValueError(f"register_model(): a model named '{name}' is already registered ({MODEL_REGISTRY[name].__name__}).")
+        MODEL_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+def get_model(name: str) -> Type[BaseGlacialModel]:
+    """
+    Look up a registered model class by name.
+
+    Raises
+    ------
+    - ValueError
+        If no model is registered under `name`.
+    """
+    try:
+        return MODEL_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown model '{name}', expected one of {sorted(MODEL_REGISTRY)}.") from None
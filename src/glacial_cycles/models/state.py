@@ -1,6 +1,9 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Mapping, Sequence
+import numpy as np
 from .base import BaseGlacialModel, GlacialState
+from .registry import register_model
 
+@register_model("state")
 class GlacialStateModel(BaseGlacialModel):
     """
     Threshold-based glacial cycle model (Paillard, 1998).
@@ -13,6 +16,7 @@ class GlacialStateModel(BaseGlacialModel):
     -----
     - The `update_state` method evaluates thresholds at each step.
     - The model tracks the time since the last transition (`tc`).
+    - Implements the batch interface (`batch_init`, `batch_step`).
 
     States
     ------
@@ -96,6 +100,8 @@ class GlacialStateModel(BaseGlacialModel):
             Insolation at previous time step.
         - insolation_previous_peak : float, optional
             Value of last insolation peak.
+        - dt : float, optional
+            Step length added to `tc` (default 1).
 
         Returns
         -------
@@ -105,11 +111,46 @@ class GlacialStateModel(BaseGlacialModel):
         i = kwargs['insolation']
         ip = kwargs.get('insolation_previous', i)
         ipp = kwargs.get('insolation_previous_peak', None)
-        self.tc += 1
+        self.tc += kwargs.get('dt', 1)
 
         self.update_state(i, ip, ipp)
         return self.get_data()
 
+    @classmethod
+    def batch_init(cls, params: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+        """Build the batch state of N models (see `BaseGlacialModel.batch_init`)."""
+        models = [cls(**p) for p in params]
+        batch = {
+            name: np.array([getattr(m, name) for m in models], dtype=float)
+            for name in ("i0", "i1", "i2", "i3", "tc", "tg")
+        }
+        batch["state"] = np.array([m.state.value for m in models], dtype=np.int8)
+        return batch
+
+    @classmethod
+    def batch_transition(cls, batch: Dict[str, np.ndarray], forcing: Mapping[str, Any], dt: float) -> None:
+        """Vectorized `step`: advance `tc` and apply `update_state` to all members."""
+        i = forcing["insolation"]
+        ip = forcing.get("insolation_previous", i)
+        ipp = forcing.get("insolation_previous_peak")
+        ipp = np.nan_to_num(np.asarray(ipp if ipp is not None else np.nan, dtype=float), nan=-np.inf)
+        batch["tc"] += dt
+
+        s = batch["state"].copy()
+        I, g, G = (GlacialState.INTERGLACIAL.value, GlacialState.MILD_GLACIAL.value, GlacialState.FULL_GLACIAL.value)
+        to_g = (s == I) & (i < batch["i0"]) & (ip > batch["i0"])
+        to_G = (s == g) & (batch["tc"] > batch["tg"]) & (i < batch["i2"]) & (ip <= batch["i2"]) & (ipp < batch["i3"])
+        to_I = (s == G) & (i > batch["i1"])
+        batch["state"][to_g] = g
+        batch["state"][to_G] = G
+        batch["state"][to_I] = I
+        batch["tc"][to_g | to_G | to_I] = 0
+
+    @classmethod
+    def batch_outputs(cls, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Current states of all members."""
+        return {"state": batch["state"].copy()}
+
     def get_data(self) -> Dict[str, GlacialState]:
         """Return current glacial state."""
         return {"state": self.state}
@@ -0,0 +1,199 @@
+"""
+Time-parallel simulation of long runs.
+
+The Paillard models forget their initial conditions after a few glacial
+cycles. A long run can therefore be split along the time axis into windows
+that are simulated in parallel: each window starts `overlap` steps early from
+a set of candidate initial conditions, and once all candidates agree (the
+trajectories have converged) the window continues from that common state.
+Windows are stitched where they meet, and every junction is verified against
+the end state of the preceding window; windows that did not converge or do
+not match are recomputed serially from the true state, so the result equals
+a serial run up to the convergence tolerance.
+"""
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type, Union
+import numpy as np
+from .models.base import BaseGlacialModel, GlacialState
+from .models.registry import get_model
+from .simulation import results_to_columns, step_lengths
+from .utils import previous_peak_values
+
+
+def models_close(a: BaseGlacialModel, b: BaseGlacialModel, atol: float) -> bool:
+    """Whether two models of the same class are in the same state (numbers within `atol`)."""
+    vb = vars(b)
+    for k, x in vars(a).items():
+        y = vb[k]
+        if isinstance(x, np.ndarray):
+            if not np.allclose(x, y, rtol=0.0, atol=atol):
+                return False
+        elif isinstance(x, (int, float, np.number)) and not isinstance(x, bool):
+            if abs(x - y) > atol:
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def _advance(model: BaseGlacialModel, steps: np.ndarray, ins: np.ndarray, ipp: np.ndarray, record: bool = True) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Step a model in place over a slice of forcing, starting at the slice's first time point.
+
+    Forcing and step lengths are passed as `GlacialSimulation` does, with the
+    previous peaks precomputed for the whole run (NaN before the first peak).
+    Returns the outputs over the slice if `record`.
+    """
+    results = [model.get_data()] if record else None
+    for t in range(1, len(ins)):
+        peak = ipp[t]
+        data = model.step(
+            insolation=ins[t],
+            insolation_previous=ins[t - 1],
+            insolation_previous_peak=None if np.isnan(peak) else peak,
+            dt=steps[t - 1],
+        )
+        if record:
+            results.append(data)
+    return results_to_columns(results) if record else None
+
+
+def _run_window(model, params, candidates, steps, ins, ipp, warmup, atol) -> Tuple[bool, BaseGlacialModel, Dict[str, np.ndarray], BaseGlacialModel]:
+    """
+    Simulate one window from candidate initial conditions.
+
+    The slices start `warmup` steps before the window. Returns whether the
+    candidates converged by the window start, the (converged) model at the
+    window start, the outputs over the window and the model at its end.
+    """
+    members = [model(**{**params, **c}) for c in candidates]
+    if warmup:
+        for m in members:
+            _advance(m, steps[:warmup], ins[:warmup + 1], ipp[:warmup + 1], record=False)
+    converged = all(models_close(members[0], m, atol) for m in members[1:])
+    start = copy.deepcopy(members[0])
+    outputs = _advance(members[0], steps[warmup:], ins[warmup:], ipp[warmup:])
+    return converged, start, outputs, members[0]
+
+
+class TimeParallelSimulation:
+    """
+    Time-parallel (windowed) simulation engine for one long run.
+
+    Notes
+    -----
+    - Windows are stepped with the scalar models (the batch interface has
+      too much overhead for a single run), with the previous insolation
+      peaks precomputed once for the whole run.
+    - Window `w > 0` is started `overlap` steps early from each of the
+      `candidates` (dicts overriding the initial conditions in `params`).
+      The default candidates are the three glacial states; pass candidates
+      varying continuous variables (e.g. `v`) as well for ice volume models,
+      which need longer overlaps (~1000 kyr) to converge to tight tolerances.
+    - Candidates count as converged when their complete model state (all
+      attributes, e.g. state, ice volume, time since the last transition)
+      agrees within `atol`.
+    - The first window runs in the calling process while the other windows
+      run on `max_workers - 1` worker processes, so `n_windows = max_workers`
+      (the default) keeps every worker busy.
+    - Parameter schedules are not supported.
+    """
+    model : Type[BaseGlacialModel]
+    """The glacial model class to simulate."""
+    params : Dict[str, Any]
+    """Constructor arguments of the run (including its initial conditions)."""
+    time_data : np.ndarray
+    """Array of time points."""
+    insolation_data : np.ndarray
+    """Insolation values corresponding to `time_data`."""
+    n_windows : int
+    """Number of time windows."""
+    overlap : int
+    """Warm-up steps before each window used for convergence."""
+    candidates : List[Dict[str, Any]]
+    """Candidate initial conditions of the windows."""
+    atol : float
+    """Absolute tolerance of the convergence and junction checks."""
+    recomputed : List[int]
+    """Windows recomputed serially during the last `run`."""
+    time_steps : bool
+    """Take step lengths from the spacing of `time_data` in kyr (default False, 1 kyr per step)."""
+
+    def __init__(
+        self,
+        model: Union[str, Type[BaseGlacialModel]],
+        params: Mapping[str, Any],
+        time_data: np.ndarray,
+        insolation_data: np.ndarray,
+        n_windows: Optional[int] = None,
+        overlap: int = 300,
+        candidates: Optional[Sequence[Mapping[str, Any]]] = None,
+        atol: float = 1e-9,
+        max_workers: Optional[int] = None,
+        time_steps: bool = False,
+    ):
+        self.model = get_model(model) if isinstance(model, str) else model
+        self.params = dict(params)
+        self.time_data = np.asarray(time_data)
+        self.insolation_data = np.asarray(insolation_data, dtype=float)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.n_windows = max(1, n_windows or self.max_workers)
+        self.overlap = overlap
+        self.candidates = [dict(c) for c in (candidates or [{"state": s} for s in GlacialState])]
+        self.atol = atol
+        self.recomputed = []
+        self.time_steps = time_steps
+
+    def run(self) -> Dict[str, np.ndarray]:
+        """
+        Run the simulation.
+
+        Returns
+        -------
+        - dict of np.ndarray
+            One array of length T per model output (states as integers),
+            equal to a serial run up to `atol`.
+        """
+        T = len(self.time_data)
+        steps, ins = step_lengths(self.time_data, self.time_steps), self.insolation_data
+        ipp = previous_peak_values(ins)
+        bounds = np.linspace(0, T - 1, self.n_windows + 1).round().astype(int)
+        bounds = np.unique(bounds)
+        windows = list(zip(bounds[:-1], bounds[1:]))
+
+        jobs = []
+        for a, b in windows[1:]:
+            s = max(0, a - self.overlap)
+            jobs.append((self.model, self.params, self.candidates, steps[s:b], ins[s:b + 1], ipp[s:b + 1], a - s, self.atol))
+
+        # the first window starts from the true initial conditions and runs in
+        # this process while the other windows run in the pool
+        first = self.model(**self.params)
+        a0, b0 = windows[0]
+        if self.max_workers > 1 and jobs:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers - 1, len(jobs))) as pool:
+                futures = [pool.submit(_run_window, *job) for job in jobs]
+                head = self._serial(first, a0, b0, steps, ipp)
+                results = [f.result() for f in futures]
+        else:
+            head = self._serial(first, a0, b0, steps, ipp)
+            results = [_run_window(*job) for job in jobs]
+
+        parts = [head[0]]
+        end = head[1]
+        self.recomputed = []
+        for w, ((a, b), (converged, start, outputs, window_end)) in enumerate(zip(windows[1:], results), start=1):
+            if not (converged and models_close(end, start, self.atol)):
+                outputs, window_end = self._serial(end, a, b, steps, ipp)
+                self.recomputed.append(w)
+            parts.append({k: v[1:] for k, v in outputs.items()})
+            end = window_end
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    def _serial(self, model: BaseGlacialModel, a: int, b: int, steps: np.ndarray, ipp: np.ndarray) -> Tuple[Dict[str, np.ndarray], BaseGlacialModel]:
+        """Run a copy of `model` over steps `a..b` in this process."""
+        model = copy.deepcopy(model)
+        outputs = _advance(model, steps[a:b], self.insolation_data[a:b + 1], ipp[a:b + 1])
+        return outputs, model
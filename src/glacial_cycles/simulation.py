@@ -1,7 +1,57 @@
 import numpy as np
-from typing import Dict, List, Optional, Callable, Any
-from .models.base import BaseGlacialModel
-from .utils import create_peaks_arr, find_latest_peak_idx
+from typing import Dict, List, Optional, Callable, Any, Mapping, Sequence, Type, Union
+from .models.base import BaseGlacialModel, GlacialState
+from .models.registry import get_model
+from .utils import create_peaks_arr, find_latest_peak_idx, previous_peak_values, f, normalize
+
+
+def step_lengths(time_data: np.ndarray, time_steps: bool = False) -> np.ndarray:
+    """
+    Step lengths passed to the model between consecutive time points.
+
+    Parameters
+    ----------
+    - time_data : np.ndarray
+        Time points of length T.
+    - time_steps : bool, optional
+        If False (default), every step is 1 kyr and `time_data` only labels
+        the steps. If True, the steps are the spacing of `time_data`, which
+        must then be strictly increasing and in kyr.
+
+    Returns
+    -------
+    - np.ndarray
+        Step lengths of shape (T - 1,).
+    """
+    T = len(time_data)
+    if not time_steps:
+        return np.ones(max(T - 1, 0))
+    dt = np.diff(np.asarray(time_data, dtype=float))
+    if np.any(dt <= 0):
+        raise ValueError("step_lengths(): time_steps=True requires a strictly increasing time axis in kyr.")
+    return dt
+
+
+def batch_groups(model: Type[BaseGlacialModel], params: Sequence[Mapping[str, Any]]) -> List[np.ndarray]:
+    """
+    Split parameter sets into groups that can share one batch.
+
+    Members are grouped by the values of the model's `batch_settings`, in
+    order of first appearance.
+
+    Returns
+    -------
+    - list of np.ndarray
+        Member indices of each group.
+    """
+    if not model.batch_settings:
+        return [np.arange(len(params))]
+    groups: Dict[tuple, List[int]] = {}
+    for n, p in enumerate(params):
+        member = model(**p)
+        groups.setdefault(tuple(getattr(member, name) for name in model.batch_settings), []).append(n)
+    return [np.array(idx) for idx in groups.values()]
+
 
 class GlacialSimulation:
     """
@@ -12,6 +62,12 @@ class GlacialSimulation:
     -----
     - Simulation is agnostic to the specific glacial model (Strategy pattern).
     - `param_schedules` allows dynamic modification of model parameters during the run.
+    - Every step is 1 kyr by default, whatever the units of `time_data`.
+      With `time_steps=True` the step length passed to the model is the
+      spacing of `time_data`, which must be strictly increasing and in kyr,
+      so models can be run on resampled (e.g. 5 kyr) forcing.
+    - `previous_peak` lets callers that run many members on the same forcing
+      share one peak detection (see `utils.previous_peak_values`).
     """
     model : BaseGlacialModel
     """The glacial model to simulate."""
@@ -23,19 +79,27 @@ class GlacialSimulation:
     """Dictionary of time-dependent parameter functions."""
     results : List[Dict[str, Any]] 
     """Array of model outputs at each time step."""
+    time_steps : bool
+    """Take step lengths from the spacing of `time_data` in kyr (default False, 1 kyr per step)."""
+    previous_peak : Optional[np.ndarray]
+    """Precomputed latest previous peak of `insolation_data` at each time, NaN before the first peak (default None, detected in `run`)."""
 
     def __init__(
         self,
         model: BaseGlacialModel,
         time_data: np.ndarray,
         insolation_data: np.ndarray,
-        param_schedules: Optional[Dict[str, Callable[[int], Any]]] = None
+        param_schedules: Optional[Dict[str, Callable[[int], Any]]] = None,
+        time_steps: bool = False,
+        previous_peak: Optional[np.ndarray] = None
     ):
         self.model = model
         self.time_data = time_data
         self.insolation_data = insolation_data
         self.results = []
         self.param_schedules = param_schedules or {}
+        self.time_steps = time_steps
+        self.previous_peak = previous_peak
 
     def run(self, verbose:Optional[bool] = None):
         """Run the simulation over the time and insolation data.
@@ -45,8 +109,10 @@ class GlacialSimulation:
         - verbose : Optional[bool]
             If True, print model state after each step."""
        
+        steps = step_lengths(self.time_data, self.time_steps)
         self.results.append(self.model.get_data())
-        peak_ids, _ = create_peaks_arr(self.insolation_data)
+        if self.previous_peak is None:
+            peak_ids, _ = create_peaks_arr(self.insolation_data)
         param_schedules = self.param_schedules or {}
         verbose = verbose or False
         if verbose: print(self.model.get_data())
@@ -54,13 +120,17 @@ class GlacialSimulation:
         for t in range(1, len(self.time_data)):
             i = self.insolation_data[t]
             ip = self.insolation_data[t - 1]
-            prev_peak_idx = find_latest_peak_idx(t, peak_ids)
-            ipp = self.insolation_data[prev_peak_idx] if prev_peak_idx is not None else None
+            if self.previous_peak is None:
+                prev_peak_idx = find_latest_peak_idx(t, peak_ids)
+                ipp = self.insolation_data[prev_peak_idx] if prev_peak_idx is not None else None
+            else:
+                ipp = None if np.isnan(self.previous_peak[t]) else self.previous_peak[t]
 
             step_result = self.model.step(
                 insolation=i,
                 insolation_previous=ip,
                 insolation_previous_peak=ipp,
+                dt=steps[t - 1],
             )
             self.results.append(step_result)
             if verbose: print(self.model.get_data())
@@ -73,3 +143,302 @@ class GlacialSimulation:
 
 
         return np.array(self.results)
+
+
+def results_to_columns(results: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert the per-step dicts returned by `GlacialSimulation.run` into arrays.
+
+    States are stored by their integer value.
+    """
+    columns = {}
+    for key in results[0]:
+        values = [r[key] for r in results]
+        if isinstance(values[0], GlacialState):
+            values = np.array([s.value for s in values], dtype=np.int8)
+        columns[key] = np.asarray(values)
+    return columns
+
+
+class GlacialEnsemble:
+    """
+    Simulation engine for many parameter sets of one glacial model.
+
+    Notes
+    -----
+    - Models implementing the batch interface (`BaseGlacialModel.supports_batch`)
+      are advanced for all members at once with vectorized steps (one batch
+      per combination of the model's `batch_settings`); other models fall
+      back to one `GlacialSimulation` per member.
+    - Previous-peak values of the forcing are computed once and shared by all
+      members, or taken from `previous_peak` if given.
+    - `param_schedules` values are applied to every member.
+    - Step lengths follow `GlacialSimulation` (1 kyr unless `time_steps`).
+    """
+    model : Type[BaseGlacialModel]
+    """The glacial model class to simulate."""
+    params : List[Dict[str, Any]]
+    """Constructor arguments of each ensemble member."""
+    time_data : np.ndarray
+    """Array of time points."""
+    insolation_data : np.ndarray
+    """Insolation values corresponding to `time_data`."""
+    param_schedules: Dict[str, Callable[[int], Any]]
+    """Dictionary of time-dependent parameter functions."""
+    time_steps : bool
+    """Take step lengths from the spacing of `time_data` in kyr (default False, 1 kyr per step)."""
+    previous_peak : Optional[np.ndarray]
+    """Precomputed latest previous peak of `insolation_data` at each time (default None, computed in `run`)."""
+
+    def __init__(
+        self,
+        model: Union[str, Type[BaseGlacialModel]],
+        params: Sequence[Mapping[str, Any]],
+        time_data: np.ndarray,
+        insolation_data: np.ndarray,
+        param_schedules: Optional[Dict[str, Callable[[int], Any]]] = None,
+        time_steps: bool = False,
+        previous_peak: Optional[np.ndarray] = None
+    ):
+        self.model = get_model(model) if isinstance(model, str) else model
+        self.params = [dict(p) for p in params]
+        self.time_data = np.asarray(time_data)
+        self.insolation_data = np.asarray(insolation_data, dtype=float)
+        self.param_schedules = param_schedules or {}
+        self.time_steps = time_steps
+        self.previous_peak = previous_peak
+
+    def run(self) -> Dict[str, np.ndarray]:
+        """
+        Run all members over the time and insolation data.
+
+        Returns
+        -------
+        - dict of np.ndarray
+            One array of shape (N, T) per model output, states as integers.
+        """
+        previous_peak = self.previous_peak
+        if previous_peak is None:
+            previous_peak = previous_peak_values(self.insolation_data)
+        if self.model.supports_batch():
+            return self._run_batch(previous_peak)
+        runs = []
+        for params in self.params:
+            sim = GlacialSimulation(
+                self.model(**params), self.time_data, self.insolation_data,
+                self.param_schedules, self.time_steps, previous_peak,
+            )
+            runs.append(results_to_columns(sim.run()))
+        return {key: np.stack([r[key] for r in runs]) for key in runs[0]}
+
+    def _run_batch(self, previous_peak: np.ndarray) -> Dict[str, np.ndarray]:
+        steps = step_lengths(self.time_data, self.time_steps)
+        outputs = {
+            key: np.empty((len(self.params), len(self.time_data)), dtype=dtype)
+            for key, dtype in self.model.output_schema.items()
+        }
+        for idx in batch_groups(self.model, self.params):
+            batch = self.model.batch_init([self.params[n] for n in idx])
+            group = _run_batch(self.model, batch, steps, self.insolation_data, previous_peak, self.param_schedules)
+            for key, val in group.items():
+                outputs[key][idx] = val
+        return outputs
+
+
+def _run_batch(
+    model: Type[BaseGlacialModel],
+    batch: Dict[str, Any],
+    steps: np.ndarray,
+    insolation: np.ndarray,
+    previous_peak: np.ndarray,
+    param_schedules: Dict[str, Callable[[int], Any]],
+    repeat: int = 1,
+) -> Dict[str, np.ndarray]:
+    """
+    Advance a batch over the forcing and collect its outputs.
+
+    `steps` holds the T - 1 step lengths (see `step_lengths`).
+
+    `insolation` and `previous_peak` are either shared by all members, shape
+    (T,), or given per group of `repeat` consecutive members, shape (K, T).
+    """
+    first = model.batch_outputs(batch)
+    M, T = len(next(iter(first.values()))), len(steps) + 1
+    outputs = {key: np.empty((M, T), dtype=dtype) for key, dtype in model.output_schema.items()}
+    for key, value in first.items():
+        outputs[key][:, 0] = value
+
+    def at(data, t):
+        return data[t] if data.ndim == 1 else np.repeat(data[:, t], repeat)
+
+    for t in range(1, T):
+        forcing = {
+            "insolation": at(insolation, t),
+            "insolation_previous": at(insolation, t - 1),
+            "insolation_previous_peak": at(previous_peak, t),
+        }
+        step_result = model.batch_step(batch, forcing, dt=steps[t - 1])
+        for key, value in step_result.items():
+            outputs[key][:, t] = value
+
+        for param, fn in param_schedules.items():
+            if param not in batch:
+                raise ValueError(f"{model.__name__}: no batch parameter {param} for param_schedules.")
+            batch[param] = np.broadcast_to(np.asarray(fn(t), dtype=float), np.shape(batch[param])).copy()
+    return outputs
+
+
+class ForcingGridResult:
+    """
+    Outputs of a `GlacialForcingGrid` run, labelled by forcing and parameter set.
+
+    Indexing with an output name returns its (K, N, T) array.
+    """
+    forcing_labels : List[str]
+    """Labels of the K forcings (first axis)."""
+    params : List[Dict[str, Any]]
+    """The N parameter sets (second axis)."""
+    time : np.ndarray
+    """Time axis of length T (last axis)."""
+    outputs : Dict[str, np.ndarray]
+    """One array of shape (K, N, T) per model output, states as integers."""
+
+    def __init__(self, forcing_labels: Sequence[str], params: Sequence[Dict[str, Any]], time: np.ndarray, outputs: Dict[str, np.ndarray]):
+        self.forcing_labels = list(forcing_labels)
+        self.params = list(params)
+        self.time = time
+        self.outputs = outputs
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.outputs[key]
+
+    def sel(self, forcing: str) -> Dict[str, np.ndarray]:
+        """Outputs of all parameter sets under one forcing, each of shape (N, T)."""
+        k = self.forcing_labels.index(forcing)
+        return {key: val[k] for key, val in self.outputs.items()}
+
+
+class GlacialForcingGrid:
+    """
+    Simulation engine for every combination of K forcings and N parameter sets.
+
+    Notes
+    -----
+    - Preprocessing, peak detection and previous-peak values are computed once
+      per forcing and shared by all parameter sets.
+    - Batch models (`BaseGlacialModel.supports_batch`) run all K × N members in
+      one vectorized batch per combination of the model's `batch_settings`,
+      with each forcing broadcast over its members;
+      other models fall back to one `GlacialEnsemble` per forcing, which is
+      given that forcing's shared previous-peak values.
+    - All forcings share `time_data`; compare windows of equal length on a
+      common (e.g. relative) time axis.
+    - Step lengths follow `GlacialSimulation` (1 kyr unless `time_steps`).
+    """
+    model : Type[BaseGlacialModel]
+    """The glacial model class to simulate."""
+    params : List[Dict[str, Any]]
+    """Constructor arguments of the N parameter sets."""
+    time_data : np.ndarray
+    """Array of time points shared by all forcings."""
+    forcing_labels : List[str]
+    """Labels of the K forcings."""
+    forcing_data : np.ndarray
+    """Preprocessed forcings, shape (K, T)."""
+    previous_peaks : np.ndarray
+    """Latest previous peak value of each forcing at each time, shape (K, T)."""
+    param_schedules: Dict[str, Callable[[int], Any]]
+    """Dictionary of time-dependent parameter functions."""
+    time_steps : bool
+    """Take step lengths from the spacing of `time_data` in kyr (default False, 1 kyr per step)."""
+
+    def __init__(
+        self,
+        model: Union[str, Type[BaseGlacialModel]],
+        params: Sequence[Mapping[str, Any]],
+        time_data: np.ndarray,
+        forcings: Mapping[str, np.ndarray],
+        normalize_input: bool = False,
+        truncate: Optional[float] = None,
+        param_schedules: Optional[Dict[str, Callable[[int], Any]]] = None,
+        time_steps: bool = False
+    ):
+        """
+        Parameters
+        ----------
+        - model : str or model class
+            Registered model name or class.
+        - params : sequence of dict
+            The N parameter sets.
+        - time_data : np.ndarray
+            Time axis of length T.
+        - forcings : dict of np.ndarray
+            The K forcing series of length T by label.
+        - normalize_input : bool, optional
+            Normalize each forcing first (default False).
+        - truncate : float, optional
+            If given, apply `f(x, truncate)` and normalize again.
+        - param_schedules : dict, optional
+            Time-dependent parameter functions applied to every member.
+        - time_steps : bool, optional
+            Take step lengths from the spacing of `time_data` in kyr (default False).
+        """
+        self.model = get_model(model) if isinstance(model, str) else model
+        self.params = [dict(p) for p in params]
+        self.time_data = np.asarray(time_data)
+        self.param_schedules = param_schedules or {}
+        self.time_steps = time_steps
+        self.forcing_labels = list(forcings)
+
+        data = []
+        for label, x in forcings.items():
+            x = np.asarray(x, dtype=float)
+            if x.shape != self.time_data.shape:
+                raise ValueError(f"GlacialForcingGrid: forcing '{label}' has shape {x.shape}, expected {self.time_data.shape}.")
+            if normalize_input:
+                x = normalize(x)
+            if truncate is not None:
+                x = normalize(f(x, a=truncate))
+            data.append(x)
+        self.forcing_data = np.stack(data)
+        self.previous_peaks = np.stack([previous_peak_values(x) for x in self.forcing_data])
+
+    def run(self) -> ForcingGridResult:
+        """
+        Run all forcing × parameter combinations.
+
+        Returns
+        -------
+        - ForcingGridResult
+            Outputs of shape (K, N, T).
+        """
+        K, N = len(self.forcing_labels), len(self.params)
+        if not self.model.supports_batch():
+            runs = [
+                GlacialEnsemble(
+                    self.model, self.params, self.time_data, x,
+                    self.param_schedules, self.time_steps, previous_peak,
+                ).run()
+                for x, previous_peak in zip(self.forcing_data, self.previous_peaks)
+            ]
+            outputs = {key: np.stack([r[key] for r in runs]) for key in runs[0]}
+            return ForcingGridResult(self.forcing_labels, self.params, self.time_data, outputs)
+
+        steps = step_lengths(self.time_data, self.time_steps)
+        outputs = {
+            key: np.empty((K, N, len(self.time_data)), dtype=dtype)
+            for key, dtype in self.model.output_schema.items()
+        }
+        for idx in batch_groups(self.model, self.params):
+            batch = self.model.batch_init([self.params[n] for n in idx])
+            batch = {
+                key: np.concatenate([val] * K) if isinstance(val, np.ndarray) else val
+                for key, val in batch.items()
+            }
+            group = _run_batch(
+                self.model, batch, steps, self.forcing_data,
+                self.previous_peaks, self.param_schedules, repeat=len(idx),
+            )
+            for key, val in group.items():
+                outputs[key][:, idx] = val.reshape(K, len(idx), -1)
+        return ForcingGridResult(self.forcing_labels, self.params, self.time_data, outputs)
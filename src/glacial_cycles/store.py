@@ -0,0 +1,280 @@
+"""
+On-disk result store for large simulation ensembles.
+
+Results are kept in a directory of immutable chunks, one per `append` call:
+
+    <path>/
+      meta.json            time axis, output dtypes and parameter columns
+      chunks/<chunk_id>/
+        params.npy         structured array with one row per member
+        <output>.npy       (n, T) array per model output
+
+Chunks are written to a temporary directory and renamed into place, so any
+number of processes can append to the same store concurrently without
+locking, and readers never see partial chunks. Outputs are opened as
+memory maps, so reads of a member or a time window of a chunk are zero-copy
+views and ensembles larger than RAM can be processed chunk by chunk.
+
+Members are numbered chunk by chunk in the order a `ResultStore` object
+first sees the chunks: its own appends are visible immediately, and
+`ResultStore.refresh` picks up chunks appended by other processes and
+numbers their members after the known ones, so indices
+returned by `query` stay valid for the lifetime of the object. Store objects
+opened at different times may number members differently.
+"""
+import json
+import os
+import time as timer
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from .models.base import GlacialState
+
+Window = Union[slice, Tuple[float, float]]
+
+
+def _scalar(value: Any) -> Optional[float]:
+    """Numeric value of a scalar parameter, None for non-scalar ones."""
+    if isinstance(value, GlacialState):
+        return float(value.value)
+    if isinstance(value, (bool, int, float, np.number)):
+        return float(value)
+    return None
+
+
+class ResultStore:
+    """
+    Chunked, memory-mapped store of ensemble outputs with a parameter index.
+
+    Examples
+    --------
+        store = ResultStore("results/sweep.store")
+        store.append(params, GlacialEnsemble("ice_volume", params, time, forcing).run(), time=time)
+        ids = store.query(vmax=(0.9, 1.1), tg=33)
+        ice = store.read("ice_volume", ids, window=(-500, 0))
+    """
+    path : Path
+    """Store directory."""
+    meta : Optional[Dict[str, Any]]
+    """Store metadata (None until the first append)."""
+    time : np.ndarray
+    """Time axis shared by all members."""
+    params : Dict[str, np.ndarray]
+    """Parameter table: one array of length `len(store)` per scalar parameter."""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self.refresh()
+
+    # ------------------------------------------------------------------ writing
+    def _init_meta(self, time: np.ndarray, outputs: Mapping[str, np.ndarray], columns: List[str]) -> None:
+        meta = {
+            "time": np.asarray(time, dtype=float).tolist(),
+            "outputs": {key: np.asarray(val).dtype.str for key, val in outputs.items()},
+            "params": columns,
+        }
+        (self.path / "chunks").mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f".meta-{uuid.uuid4().hex}.json"
+        tmp.write_text(json.dumps(meta))
+        try:
+            os.link(tmp, self.path / "meta.json")  # atomic, fails if another writer won the race
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+        self.refresh()
+
+    def append(self, params: Sequence[Mapping[str, Any]], outputs: Mapping[str, np.ndarray], time: Optional[np.ndarray] = None) -> str:
+        """
+        Append the results of n ensemble members as a new chunk.
+
+        Parameters
+        ----------
+        - params : sequence of dict
+            Parameters of each member; scalar entries (numbers, states) form the
+            parameter table, other entries are ignored.
+        - outputs : dict of np.ndarray
+            Arrays of shape (n, T) per output, e.g. from `GlacialEnsemble.run`.
+        - time : np.ndarray, optional
+            Time axis of length T; required for the first append to a new store.
+
+        Returns
+        -------
+        - str
+            Id of the written chunk.
+        """
+        outputs = {key: np.atleast_2d(val) for key, val in outputs.items()}
+        n = len(params)
+        if self.meta is None:
+            if time is None:
+                raise ValueError("ResultStore.append(): the first append to a new store needs the time axis.")
+            columns = [k for k, v in params[0].items() if _scalar(v) is not None]
+            self._init_meta(time, outputs, columns)
+
+        T = len(self.meta["time"])
+        if set(outputs) != set(self.meta["outputs"]):
+            raise ValueError(f"ResultStore.append(): outputs {sorted(outputs)} don't match the store's {sorted(self.meta['outputs'])}.")
+        for key, val in outputs.items():
+            if val.shape != (n, T):
+                raise ValueError(f"ResultStore.append(): output '{key}' has shape {val.shape}, expected {(n, T)}.")
+
+        columns = self.meta["params"]
+        table = np.empty(n, dtype=[(c, "f8") for c in columns])
+        for c in columns:
+            try:
+                table[c] = [_scalar(p[c]) for p in params]
+            except KeyError:
+                raise ValueError(f"ResultStore.append(): parameter '{c}' is missing from some members.") from None
+
+        tmp = self.path / "chunks" / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        np.save(tmp / "params.npy", table)
+        for key, val in outputs.items():
+            np.save(tmp / f"{key}.npy", val.astype(self.meta["outputs"][key], copy=False))
+        chunk_id = f"{timer.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.rename(tmp, self.path / "chunks" / chunk_id)
+        self._register([self.path / "chunks" / chunk_id], [table])
+        return chunk_id
+
+    # ------------------------------------------------------------------ indexing
+    def refresh(self) -> None:
+        """Rescan the store for chunks (including ones appended by other processes)."""
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            self.meta, self.time = None, np.empty(0)
+            self._chunks, self._tables, self._offsets, self.params = [], [], np.zeros(1, dtype=int), {}
+            self._sorted = {}
+            return
+        if getattr(self, "meta", None) is None:
+            self._chunks, self._tables = [], []
+        self.meta = json.loads(meta_path.read_text())
+        self.time = np.asarray(self.meta["time"])
+        # known chunks keep their position, new ones are numbered after them
+        known = {p.name for p in self._chunks}
+        new = sorted(p for p in (self.path / "chunks").iterdir() if not p.name.startswith(".") and p.name not in known)
+        self._register(new, [np.load(p / "params.npy") for p in new])
+
+    def _register(self, chunks: List[Path], tables: List[np.ndarray]) -> None:
+        """Number the members of `chunks` after the known ones and rebuild the parameter table."""
+        self._chunks += chunks
+        self._tables += tables
+        self._offsets = np.cumsum([0] + [len(t) for t in self._tables])
+        self.params = {
+            c: np.concatenate([t[c] for t in self._tables]) if self._tables else np.empty(0)
+            for c in self.meta["params"]
+        }
+        self._sorted = {}
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def _index(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted values and member order of a parameter column (built lazily)."""
+        if column not in self._sorted:
+            if column not in self.params:
+                raise ValueError(f"ResultStore.query(): unknown parameter '{column}', expected one of {sorted(self.params)}.")
+            order = np.argsort(self.params[column], kind="stable")
+            self._sorted[column] = (self.params[column][order], order)
+        return self._sorted[column]
+
+    def query(self, **conditions: Any) -> np.ndarray:
+        """
+        Find members by parameter values.
+
+        Parameters
+        ----------
+        - **conditions
+            `name=(lo, hi)` selects `lo <= name <= hi`; `name=value` selects
+            equality. Conditions are combined with AND.
+
+        Returns
+        -------
+        - np.ndarray
+            Sorted indices of matching members.
+        """
+        ids = np.arange(len(self))
+        for column, cond in conditions.items():
+            values, order = self._index(column)
+            lo, hi = cond if isinstance(cond, tuple) else (_scalar(cond), _scalar(cond))
+            sel = order[np.searchsorted(values, lo, "left"):np.searchsorted(values, hi, "right")]
+            ids = np.intersect1d(ids, sel, assume_unique=True)
+        return ids
+
+    # ------------------------------------------------------------------ reading
+    def _time_slice(self, window: Optional[Window]) -> slice:
+        if window is None or isinstance(window, slice):
+            return window or slice(None)
+        start, end = window
+        return slice(np.searchsorted(self.time, start, "left"), np.searchsorted(self.time, end, "right"))
+
+    def _open(self, chunk: int, name: str) -> np.ndarray:
+        return np.load(self._chunks[chunk] / f"{name}.npy", mmap_mode="r")
+
+    def iter_chunks(self, name: str, window: Optional[Window] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Iterate over an output chunk by chunk.
+
+        Yields
+        ------
+        - offset : int
+            Index of the first member of the chunk.
+        - data : np.ndarray
+            Zero-copy memory-mapped view of shape (n_chunk, T_window).
+        """
+        tsl = self._time_slice(window)
+        for k in range(len(self._chunks)):
+            yield int(self._offsets[k]), self._open(k, name)[:, tsl]
+
+    def read(self, name: str, members: Union[None, int, slice, Sequence[int], np.ndarray] = None, window: Optional[Window] = None) -> np.ndarray:
+        """
+        Read an output for selected members and a time window.
+
+        Parameters
+        ----------
+        - name : str
+            Output name, e.g. "ice_volume".
+        - members : int, slice or array of int, optional
+            Member indices (default: all).
+        - window : slice or (start, end), optional
+            Time-index slice or time window in units of the time axis.
+
+        Returns
+        -------
+        - np.ndarray
+            Shape (T_window,) for a single member, (n, T_window) otherwise. A
+            single member, or a slice of members within one chunk, is returned
+            as a zero-copy memory-mapped view; other selections are copied.
+        """
+        tsl = self._time_slice(window)
+        if not len(self):
+            raise IndexError("ResultStore.read(): the store is empty.")
+        if isinstance(members, (int, np.integer)):
+            i = int(members) + len(self) if members < 0 else int(members)
+            if not 0 <= i < len(self):
+                raise IndexError(f"ResultStore.read(): member {members} out of range for a store of {len(self)} members.")
+            k = np.searchsorted(self._offsets, i, "right") - 1
+            return self._open(k, name)[i - self._offsets[k], tsl]
+        if members is None:
+            members = slice(None)
+        if isinstance(members, slice):
+            start, stop, step = members.indices(len(self))
+            k = np.searchsorted(self._offsets, start, "right") - 1
+            if step == 1 and start < len(self) and stop <= self._offsets[k + 1]:
+                return self._open(k, name)[start - self._offsets[k]:max(start, stop) - self._offsets[k], tsl]
+            members = np.arange(start, stop, step)
+
+        members = np.asarray(members, dtype=int)
+        members = np.where(members < 0, members + len(self), members)
+        if np.any((members < 0) | (members >= len(self))):
+            raise IndexError(f"ResultStore.read(): members out of range for a store of {len(self)} members.")
+        chunk = np.searchsorted(self._offsets, members, "right") - 1
+        out = np.empty((len(members), len(self.time[tsl])), dtype=self.meta["outputs"][name])
+        for k in np.unique(chunk):
+            rows = chunk == k
+            out[rows] = self._open(k, name)[members[rows] - self._offsets[k], tsl]
+        return out
+
+    def member(self, i: int, window: Optional[Window] = None) -> Dict[str, np.ndarray]:
+        """All outputs of member `i` as zero-copy views."""
+        return {name: self.read(name, i, window) for name in self.meta["outputs"]}
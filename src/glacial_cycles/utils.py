@@ -5,6 +5,8 @@ Functions
 ---------
 - f(x, a=1):
     Truncation function for forcing.
+- normalize(data):
+    Shift and scale data to zero mean and unit standard deviation.
 - ice_vol_diff(F, vR, τR, τF):
     Returns differential function for ice volume dynamics.
 - RK4_step(df, v, t, dt):
@@ -13,6 +15,8 @@ Functions
     Identify peaks in a time series.
 - find_latest_peak_idx(t, peak_ids):
     Find the index of the most recent peak before time `t`.
+- previous_peak_values(data):
+    Value of the most recent peak before every time index.
 """
 from scipy.signal import find_peaks
 import numpy as np
@@ -36,6 +40,23 @@ def f(x, a=1):
     f = 1/2 * (x + np.sqrt(4 * a**2 + x**2))
     return f
 
+def normalize(data):
+    """
+    Normalize data to zero mean and unit (population) standard deviation.
+
+    Parameters
+    ----------
+    - data : np.ndarray
+        Input data array.
+
+    Returns
+    -------
+    - np.ndarray
+        Normalized copy of the data.
+    """
+    data = np.asarray(data, dtype=float)
+    return (data - np.mean(data)) / np.std(data)
+
 # differential function for use in RK4
 def ice_vol_diff(F, vR, τR, τF):
     """
@@ -125,3 +146,25 @@ def find_latest_peak_idx(t, peak_ids):
     """
     ids = peak_ids[peak_ids < t]
     return ids[-1] if len(ids) else None
+
+def previous_peak_values(data):
+    """
+    Value of the most recent peak strictly before each time index.
+
+    Vectorized equivalent of calling `find_latest_peak_idx` for every `t`.
+
+    Parameters
+    ----------
+    - data : np.ndarray
+        Input data array.
+
+    Returns
+    -------
+    - np.ndarray
+        Array like `data` holding the latest previous peak value, NaN where no
+        previous peak exists.
+    """
+    data = np.asarray(data, dtype=float)
+    peak_ids, peak_vals = create_peaks_arr(data)
+    k = np.searchsorted(peak_ids, np.arange(len(data))) - 1
+    return np.append(peak_vals, np.nan)[k]  # k = -1 (no previous peak) picks the NaN
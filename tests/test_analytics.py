@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from glacial_cycles.analytics import (
+    cycle_lengths, mean_cycle_length, regime_shift, run_lengths,
+    state_occupancy, terminations, transition_times,
+)
+from glacial_cycles.models.base import GlacialState
+
+# i = 2, g = 1, G = 0
+STATES = np.array([
+    [2, 2, 1, 1, 0, 2, 2, 1, 0, 0, 2],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [0, 2, 1, 0, 2, 1, 1, 1, 0, 0, 2],
+])
+
+def test_run_lengths():
+    '''
+    run_lengths() should encode every row into runs of constant state that add up to the row length
+    '''
+    member, start, length, value = run_lengths(STATES)
+    assert member.tolist() == [0] * 7 + [1] + [2] * 8
+    assert start[member == 0].tolist() == [0, 2, 4, 5, 7, 8, 10]
+    assert value[member == 0].tolist() == [2, 1, 0, 2, 1, 0, 2]
+    assert np.bincount(member, weights=length).tolist() == [11, 11, 11]
+
+def test_transition_and_termination_times():
+    '''
+    terminations() should report the first INTERGLACIAL step after each FULL_GLACIAL run, per member
+    '''
+    member, t = terminations(STATES)
+    assert member.tolist() == [0, 0, 2, 2, 2]
+    assert t.tolist() == [5, 10, 1, 4, 10]
+
+    member, t = transition_times(STATES, time=-10.0 + np.arange(11), from_state=GlacialState.INTERGLACIAL)
+    assert member.tolist() == [0, 0, 2, 2]
+    assert t.tolist() == [-8, -3, -8, -5]
+
+def test_state_occupancy():
+    '''
+    state_occupancy() should count the time spent in each state, indexed by state value
+    '''
+    occ = state_occupancy(STATES, dt=2.0)
+    assert occ.tolist() == [[6, 6, 10], [0, 22, 0], [8, 8, 6]]
+    # non-uniform steps are weighted by their duration
+    assert np.array_equal(state_occupancy(STATES, time=2.0 * np.arange(11)), occ)
+    time = np.array([0, 1, 2, 3, 4, 5, 10, 11, 12, 13, 14], dtype=float)
+    assert state_occupancy(STATES, time=time)[0].tolist() == [3, 3, 9]
+
+def test_cycle_lengths_and_regime_shift():
+    '''
+    Cycle lengths are the intervals between consecutive terminations of the same member;
+    members without two terminations have no cycles
+    '''
+    member, end, length = cycle_lengths(STATES)
+    assert member.tolist() == [0, 2, 2]
+    assert end.tolist() == [10, 4, 10]
+    assert length.tolist() == [5, 3, 6]
+
+    mean = mean_cycle_length(STATES)
+    assert mean[0] == 5 and np.isnan(mean[1]) and mean[2] == 4.5
+
+    time = np.arange(STATES.shape[1])
+    shift = regime_shift(STATES, time, split=5)
+    assert np.allclose(shift[[0, 2]], [[np.nan, 5], [3, 6]], equal_nan=True)
+    # a cycle ending exactly at the split belongs to the later regime only
+    shift = regime_shift(STATES, time, split=4)
+    assert np.allclose(shift[[0, 2]], [[np.nan, 5], [np.nan, 4.5]], equal_nan=True)
+    # the split is a time in kyr, so index times are not accepted
+    with pytest.raises(ValueError):
+        regime_shift(STATES, None)
@@ -0,0 +1,53 @@
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from PIL import Image
+from glacial_cycles.animation import animate_icevol_model, decimate
+from glacial_cycles.models.base import GlacialState
+
+def test_decimate_keeps_extremes():
+    '''
+    decimate() should reduce a long series to at most two points per bin while keeping its extremes and time order
+    '''
+    x = np.arange(10_000)
+    y = np.sin(x / 50.0) + (x == 1234) * 5.0
+    dx, dy = decimate(x, y, 100)
+    assert len(dx) <= 200
+    assert np.all(np.diff(dx) >= 0)
+    assert dy.max() == y.max() and dy.min() == y.min()
+    short_x, short_y = decimate(x[:50], y[:50], 100)
+    assert np.array_equal(short_y, y[:50])
+
+def test_animate_icevol_model_writes_png_sequence(tmp_path):
+    '''
+    animate_icevol_model() should write one PNG per frame, with frames changing during playback
+    '''
+    T = 300
+    time = np.arange(-T + 1, 1, dtype=float)
+    forcing = np.sin(time / 10)
+    ice = np.cumsum(-forcing) / 10
+    states = [GlacialState((t // 50) % 3) for t in range(T)]
+
+    out = animate_icevol_model(
+        time, forcing, forcing, ice, states, vR=np.array([1, 1, 0]),
+        savepath=tmp_path / "frames", n_frames=12, figsize=(4, 3), dpi=50,
+    )
+    frames = sorted(out.glob("frame_*.png"))
+    assert len(frames) == 12
+    first, last = (np.asarray(Image.open(p)) for p in (frames[0], frames[-1]))
+    assert first.shape == last.shape == (150, 200, 4)
+    assert not np.array_equal(first, last)
+
+def test_animate_icevol_model_writes_frame_stack(tmp_path):
+    '''
+    A .npy savepath should store the raw RGBA frames as one (n_frames, height, width, 4) array
+    '''
+    T = 100
+    time = np.arange(-T + 1, 1, dtype=float)
+    states = [GlacialState.MILD_GLACIAL] * T
+    out = animate_icevol_model(
+        time, np.sin(time), np.sin(time), np.cos(time), states, vR=np.array([1, 1, 0]),
+        savepath=tmp_path / "frames.npy", n_frames=5, figsize=(4, 3), dpi=50,
+    )
+    frames = np.load(out)
+    assert frames.shape == (5, 150, 200, 4) and frames.dtype == np.uint8
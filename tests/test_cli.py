@@ -0,0 +1,72 @@
+import json
+import numpy as np
+from glacial_cycles.cli import expand_grid, load_config, main, run_experiment
+from glacial_cycles.models.base import GlacialState
+
+def _write_config(tmp_path, **overrides):
+    exp = {
+        "name": "icevol",
+        "model": "ice_volume",
+        "dataset": {"source": "laskar"},
+        "window": {"start": -100, "end": 0},
+        "preprocessing": {"truncate": 1.0},
+        "params": {"state": "MILD_GLACIAL", "v": 0.75},
+        "grid": {"vmax": [0.9, 1.1], "τF": [20.0, 25.0, 30.0]},
+        "outputs": {"directory": str(tmp_path / "out")},
+    }
+    exp.update(overrides)
+    path = tmp_path / "exp.json"
+    path.write_text(json.dumps({"experiments": [exp]}))
+    return path
+
+def test_expand_grid():
+    '''
+    expand_grid() should return one parameter set per point of the Cartesian product, keeping fixed params
+    '''
+    sets = expand_grid({"v": 0.5}, {"vmax": [1, 2], "i0": [0, 1, 2]})
+    assert len(sets) == 6
+    assert all(s["v"] == 0.5 for s in sets)
+    assert {(s["vmax"], s["i0"]) for s in sets} == {(a, b) for a in [1, 2] for b in [0, 1, 2]}
+
+def test_run_experiment_parallel_matches_serial(tmp_path):
+    '''
+    Results written by a parallel run should be column-wise identical to a serial run, in grid order
+    '''
+    exp = load_config(_write_config(tmp_path))[0]
+    timing = run_experiment(exp, workers=1, output_dir=tmp_path / "serial")
+    run_experiment(exp, workers=3, output_dir=tmp_path / "parallel")
+    serial = np.load(tmp_path / "serial" / "icevol.npz")
+    parallel = np.load(tmp_path / "parallel" / "icevol.npz")
+
+    assert timing["runs"] == 6
+    assert serial["ice_volume"].shape == (6, len(serial["time"]))
+    assert serial["state"][:, 0].tolist() == [GlacialState.MILD_GLACIAL.value] * 6
+    assert serial["param_vmax"].tolist() == [0.9, 0.9, 0.9, 1.1, 1.1, 1.1]
+    for key in serial.files:
+        assert np.array_equal(serial[key], parallel[key])
+
+def test_main_writes_results_and_figures(tmp_path, capsys):
+    '''
+    The command-line entry point should write results and figures and print a timing summary
+    '''
+    path = _write_config(tmp_path, grid={"vmax": [1.0]})
+    assert main([str(path), "--workers", "1", "--figures"]) == 0
+    assert (tmp_path / "out" / "icevol.npz").exists()
+    assert (tmp_path / "out" / "icevol_0.png").exists()
+    assert "icevol" in capsys.readouterr().out
+
+def test_run_experiment_grid_over_batch_settings(tmp_path):
+    '''
+    A grid over settings that must be uniform within a batch (e.g. max_substep) should run as separate batches,
+    with rows in grid order matching single-setting runs
+    '''
+    exp = load_config(_write_config(tmp_path, grid={"max_substep": [0.5, 1.0], "locate_crossings": [False, True]}))[0]
+    run_experiment(exp, workers=1, output_dir=tmp_path / "mixed")
+    mixed = np.load(tmp_path / "mixed" / "icevol.npz")
+    assert mixed["ice_volume"].shape[0] == 4
+    for n, (max_substep, locate) in enumerate([(0.5, False), (0.5, True), (1.0, False), (1.0, True)]):
+        single = load_config(_write_config(tmp_path, grid={"max_substep": [max_substep], "locate_crossings": [locate]}))[0]
+        run_experiment(single, workers=1, output_dir=tmp_path / f"single{n}")
+        ref = np.load(tmp_path / f"single{n}" / "icevol.npz")
+        assert np.array_equal(mixed["ice_volume"][n], ref["ice_volume"][0])
+        assert np.array_equal(mixed["state"][n], ref["state"][0])
@@ -1,3 +1,4 @@
+import numpy as np
 from glacial_cycles.models.base import GlacialState
 from glacial_cycles.models.ice_volume import GlacialIceVolumeModel
 
@@ -36,3 +37,77 @@ def test_ice_volume_model_full_glacial_to_interglacial():
     _ = model.step(insolation=0.0)
     assert model.state == GlacialState.INTERGLACIAL
 
+
+def test_ice_volume_model_substeps_match_fine_steps():
+    '''
+    One step of length dt split into sub-steps of length 1 should give the same ice volume as dt steps of length 1
+    '''
+    fine = GlacialIceVolumeModel(v=0.2)
+    coarse = GlacialIceVolumeModel(v=0.2, max_substep=1.0)
+    for _ in range(5):
+        fine.step(insolation=-0.5)
+    coarse.step(insolation=-0.5, dt=5)
+    assert abs(fine.v - coarse.v) < 1e-12
+
+def test_ice_volume_model_located_crossing_independent_of_dt():
+    '''
+    With locate_crossings, the MILD_GLACIAL -> FULL_GLACIAL switch should happen at v = vmax inside the step,
+    so coarse steps give the same trajectory as fine steps
+    '''
+    state_params = np.array([[20.0, 0.5], [50.0, 1.0], [10.0, 0.0]])
+    params = dict(state=GlacialState.MILD_GLACIAL, v=0.5, vmax=1.0, i1=10.0, state_params=state_params, locate_crossings=True)
+    fine = GlacialIceVolumeModel(**params)
+    coarse = GlacialIceVolumeModel(max_substep=1.0, **params)
+    for _ in range(10):
+        fine.step(insolation=-2.0, dt=1)
+    for _ in range(2):
+        coarse.step(insolation=-2.0, dt=5)
+    assert fine.state == coarse.state == GlacialState.FULL_GLACIAL
+    assert abs(fine.v - coarse.v) < 1e-9
+
+    # the crossing is located, so the switch does not wait for the end of the step
+    unlocated = GlacialIceVolumeModel(max_substep=1.0, **{**params, "locate_crossings": False})
+    for _ in range(2):
+        unlocated.step(insolation=-2.0, dt=5)
+    assert abs(unlocated.v - coarse.v) > 1e-3
+
+def test_ice_volume_model_unsplit_coarse_steps_keep_transition_timing():
+    '''
+    Without sub-stepping, single RK4 steps of 5 kyr should switch to FULL_GLACIAL within the same 5 kyr as steps
+    of 1 kyr and end close to the fine trajectory
+    '''
+    state_params = np.array([[20.0, 0.5], [50.0, 1.0], [10.0, 0.0]])
+    params = dict(state=GlacialState.MILD_GLACIAL, v=0.5, vmax=1.0, i1=10.0, state_params=state_params, locate_crossings=True)
+    def switch_time(model, dt, n_steps):
+        for k in range(1, n_steps + 1):
+            model.step(insolation=-2.0, dt=dt)
+            if model.state == GlacialState.FULL_GLACIAL:
+                return k * dt
+    fine, coarse = GlacialIceVolumeModel(**params), GlacialIceVolumeModel(**params)
+    t_fine, t_coarse = switch_time(fine, 1, 20), switch_time(coarse, 5, 4)
+    assert t_coarse - 5 < t_fine <= t_coarse
+    for _ in range(20 - t_fine):
+        fine.step(insolation=-2.0, dt=1)
+    for _ in range((20 - t_coarse) // 5):
+        coarse.step(insolation=-2.0, dt=5)
+    assert abs(fine.v - coarse.v) < 5e-3
+
+def test_ice_volume_model_error_controlled_substeps():
+    '''
+    With substep_tol, coarse steps should be refined until they match a very finely resolved run, for single
+    models and batches alike
+    '''
+    state_params = np.array([[20.0, 0.5], [50.0, 1.0], [10.0, 0.0]])
+    params = dict(state=GlacialState.MILD_GLACIAL, v=0.5, vmax=1.0, i1=10.0, state_params=state_params, locate_crossings=True)
+    reference = GlacialIceVolumeModel(max_substep=1e-3, **params)
+    adaptive = GlacialIceVolumeModel(substep_tol=1e-9, **params)
+    for _ in range(20):
+        reference.step(insolation=-2.0, dt=1)
+    for _ in range(4):
+        adaptive.step(insolation=-2.0, dt=5)
+    assert abs(reference.v - adaptive.v) < 1e-7
+
+    batch = GlacialIceVolumeModel.batch_init([{**params, "substep_tol": 1e-9}, {**params, "substep_tol": 1e-9, "v": 0.2}])
+    for _ in range(4):
+        out = GlacialIceVolumeModel.batch_step(batch, {"insolation": -2.0}, dt=5)
+    assert abs(out["ice_volume"][0] - reference.v) < 1e-7
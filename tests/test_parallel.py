@@ -0,0 +1,40 @@
+import numpy as np
+from glacial_cycles.data import load_orbital
+from glacial_cycles.models.base import GlacialState
+from glacial_cycles.parallel import TimeParallelSimulation
+from glacial_cycles.simulation import GlacialEnsemble
+from glacial_cycles.utils import f, normalize
+
+def _berger():
+    time, insolation = load_orbital("berger")
+    return time, normalize(insolation)
+
+def test_time_parallel_state_model_matches_serial():
+    '''
+    Windows started from all candidate states should converge and stitch into the serial trajectory
+    '''
+    time, insolation = _berger()
+    params = dict(state=GlacialState.FULL_GLACIAL, i1=-0.08, i2=-0.08)
+    serial = GlacialEnsemble("state", [params], time, insolation).run()
+
+    sim = TimeParallelSimulation("state", params, time, insolation, n_windows=4, overlap=300, max_workers=2)
+    out = sim.run()
+    assert sim.recomputed == []
+    assert np.array_equal(out["state"], serial["state"][0])
+
+def test_time_parallel_falls_back_to_serial_windows():
+    '''
+    Windows whose candidates have not converged should be recomputed serially, still matching the serial run
+    '''
+    time, insolation = _berger()
+    forcing = normalize(f(insolation))
+    params = dict(state=GlacialState.MILD_GLACIAL, v=0.75)
+    candidates = [dict(state=s, v=v) for s in GlacialState for v in (0.0, 0.5, 1.0)]
+    serial = GlacialEnsemble("ice_volume", [params], time, forcing).run()
+
+    for overlap, n_recomputed in [(20, 3), (1000, 0)]:
+        sim = TimeParallelSimulation("ice_volume", params, time, forcing, n_windows=4, overlap=overlap, candidates=candidates, max_workers=1)
+        out = sim.run()
+        assert len(sim.recomputed) == n_recomputed
+        assert np.array_equal(out["state"], serial["state"][0])
+        assert np.allclose(out["ice_volume"], serial["ice_volume"][0], atol=1e-8)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from glacial_cycles.data import load_proxy, select_window
+from glacial_cycles.proxy import (
+    ProxyOperator, fft_convolve, interpolation_plan, proxy_misfit, response_kernel,
+)
+
+def test_response_kernel():
+    '''
+    The response kernel should be normalized, causal and delayed by the lag
+    '''
+    k = response_kernel(tau=5.0, dt=1.0, lag=3.0)
+    assert k.sum() == pytest.approx(1.0)
+    assert np.all(k[:3] == 0) and k[3] == k.max()
+    assert response_kernel(tau=0.0).tolist() == [1.0]
+
+def test_fft_convolve_matches_direct_convolution():
+    '''
+    fft_convolve() should equal a direct causal convolution of the series extended with its first value,
+    for a whole ensemble at once
+    '''
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(4, 300))
+    k = response_kernel(tau=7.0, lag=2.0)
+    y = fft_convolve(x, k)
+    for n in range(4):
+        padded = np.concatenate([np.full(len(k) - 1, x[n, 0]), x[n]])
+        assert np.allclose(y[n], np.convolve(padded, k, mode="valid"))
+
+def test_interpolation_plan_matches_interp_and_is_cached():
+    '''
+    The interpolation plan should reproduce np.interp onto unsorted proxy timestamps, give NaN outside
+    the model range, and be reused for the same time axes
+    '''
+    model_time = np.arange(-876.0, 1.0)
+    proxy_time, _ = load_proxy("LR04")
+    plan = interpolation_plan(model_time, proxy_time)
+    assert plan is interpolation_plan(model_time.copy(), proxy_time.copy())
+
+    y = np.stack([np.sin(model_time / 20), np.cos(model_time / 7)])
+    out = plan(y)
+    inside = (proxy_time >= -876) & (proxy_time <= 0)
+    assert np.all(np.isnan(out[:, ~inside]))
+    for n in range(2):
+        assert np.allclose(out[n, inside], np.interp(proxy_time[inside], model_time, y[n]))
+
+def test_proxy_operator_and_misfit():
+    '''
+    A constant ice volume should map to offset + scale * v, and a record generated by the operator itself should
+    have zero misfit, also after fitting scale and offset
+    '''
+    op = ProxyOperator(scale=1.5, offset=3.0, tau=4.0, lag=2.0, temperature_weight=0.2)
+    T = 500
+    time = np.arange(-T + 1, 1.0)
+    assert np.allclose(op.forward(np.full(T, 0.5), temperature=np.full(T, 0.5)), 3.75)
+    with pytest.raises(ValueError):
+        op.forward(np.zeros(T))
+
+    ice = np.stack([np.sin(time / 30) ** 2, np.cos(time / 11) ** 2])
+    temp = -ice
+    proxy_time, _ = select_window(*load_proxy("EDC"), start=-400)
+    observed = op.to_proxy(ice[0], time, proxy_time, temperature=temp[0])
+    synthetic = op.to_proxy(ice, time, proxy_time, temperature=temp)
+    misfit = proxy_misfit(synthetic, observed)
+    assert misfit.shape == (2,)
+    assert misfit[0] == pytest.approx(0.0) and misfit[1] > 0.1
+    assert proxy_misfit(2 * synthetic - 1, observed, fit_scale=True)[0] == pytest.approx(0.0, abs=1e-12)
+
+def test_proxy_operator_follows_parameter_changes_and_time_direction():
+    '''
+    Changing tau or lag should rebuild the kernel, and the response should be causal in time on a decreasing
+    model time axis as well
+    '''
+    time = np.arange(0.0, 101.0)
+    step = (time >= 50).astype(float)
+    op = ProxyOperator(tau=0.0)
+    op.forward(step)
+    op.tau, op.lag = 10.0, 5.0
+    expected = ProxyOperator(tau=10.0, lag=5.0).forward(step)
+    assert np.allclose(op.forward(step), expected)
+    assert expected[55] < 0.2
+
+    proxy_time = np.array([45.0, 60.0, 80.0])
+    forward = op.to_proxy(step, time, proxy_time)
+    backward = op.to_proxy(step[::-1], time[::-1], proxy_time)
+    assert np.allclose(forward, op.forward(step)[[45, 60, 80]])
+    assert np.allclose(backward, forward)
+    with pytest.raises(ValueError):
+        op.to_proxy(step, np.r_[time[:50], time[:51]], proxy_time)
@@ -1,6 +1,10 @@
 import numpy as np
-from glacial_cycles.simulation import GlacialSimulation 
-from glacial_cycles.models.base import GlacialState
+import pytest
+from glacial_cycles.data import load_orbital, select_window
+from glacial_cycles.models.registry import get_model
+from glacial_cycles.simulation import GlacialSimulation, GlacialEnsemble, GlacialForcingGrid, results_to_columns
+from glacial_cycles.utils import RK4_step, f, normalize
+from glacial_cycles.models.base import BaseGlacialModel, GlacialState
 from glacial_cycles.models.state import GlacialStateModel
 from glacial_cycles.models.ice_volume import GlacialIceVolumeModel
 
@@ -32,3 +36,187 @@ def test_simulation_ice_volume_model():
     assert states[0] == GlacialState.INTERGLACIAL  # initial
     assert GlacialState.MILD_GLACIAL in states
     assert GlacialState.FULL_GLACIAL in states  # at least one transition
+
+
+def _scalar_columns(model_cls, params, time, insolation, time_steps=False):
+    return [results_to_columns(GlacialSimulation(model_cls(**p), time, insolation, time_steps=time_steps).run()) for p in params]
+
+def test_ensemble_batch_matches_scalar_state_model():
+    '''
+    The vectorized batch path of GlacialEnsemble should reproduce per-member GlacialSimulation runs of the state model
+    '''
+    time, insolation = load_orbital("laskar")
+    time, insolation = select_window(time, normalize(insolation), start=-400)
+    params = [dict(state=GlacialState.FULL_GLACIAL, i0=-0.75, i1=i1, i2=i1, tg=tg) for i1 in (-0.08, 0.0) for tg in (20, 33)]
+
+    assert GlacialStateModel.supports_batch()
+    out = GlacialEnsemble("state", params, time, insolation).run()
+    for n, cols in enumerate(_scalar_columns(GlacialStateModel, params, time, insolation)):
+        assert np.array_equal(out["state"][n], cols["state"])
+
+def test_ensemble_batch_matches_scalar_ice_volume_model():
+    '''
+    The vectorized batch path should reproduce scalar ice volume runs, including sub-stepping and located crossings
+    on 5 kyr forcing
+    '''
+    time, insolation = load_orbital("laskar")
+    time, forcing = select_window(time[::5], normalize(f(normalize(insolation)))[::5], start=-800)
+    params = [dict(state=GlacialState.MILD_GLACIAL, v=0.75, vmax=vmax, max_substep=1.0, locate_crossings=True) for vmax in (0.9, 1.0, 1.1)]
+
+    out = GlacialEnsemble(GlacialIceVolumeModel, params, time, forcing, time_steps=True).run()
+    for n, cols in enumerate(_scalar_columns(GlacialIceVolumeModel, params, time, forcing, time_steps=True)):
+        assert np.array_equal(out["state"][n], cols["state"])
+        assert np.allclose(out["ice_volume"][n], cols["ice_volume"], atol=1e-9)
+
+class _RelaxationModel(BaseGlacialModel):
+    '''Minimal model using the default batch_step: only batch_init and batch_rhs are defined'''
+    output_schema = {"state": np.int8, "x": np.float64}
+    batch_variables = ("x",)
+
+    def __init__(self, **params):
+        self.τ = params.get("τ", 10.0)
+        self.x = params.get("x", 0.0)
+        self._state = GlacialState.INTERGLACIAL
+
+    @property
+    def state(self):
+        return self._state
+
+    def set_state(self, new_state):
+        self._state = new_state
+
+    def step(self, **kwargs):
+        dt = kwargs.get("dt", 1)
+        self.x = RK4_step(lambda x, t: -x / self.τ - kwargs["insolation"], self.x, t=0, dt=dt)
+        return self.get_data()
+
+    def get_data(self):
+        return {"state": self.state, "x": self.x}
+
+    @classmethod
+    def batch_init(cls, params):
+        models = [cls(**p) for p in params]
+        return {
+            "τ": np.array([m.τ for m in models]),
+            "x": np.array([m.x for m in models]),
+            "state": np.array([m.state.value for m in models], dtype=np.int8),
+        }
+
+    @classmethod
+    def batch_rhs(cls, y, batch, forcing):
+        return -y / batch["τ"] - forcing["insolation"]
+
+def test_ensemble_default_batch_step_matches_scalar_model():
+    '''
+    A model implementing only batch_init and batch_rhs should run through the default batch_step and reproduce
+    its scalar step() runs, also on uneven time steps
+    '''
+    time, insolation = load_orbital("laskar")
+    time, insolation = select_window(time, normalize(insolation), start=-300)
+    time, insolation = np.r_[time[:100:5], time[100:]], np.r_[insolation[:100:5], insolation[100:]]
+    params = [dict(τ=τ, x=x) for τ in (5.0, 20.0) for x in (0.0, 1.0)]
+
+    assert _RelaxationModel.supports_batch()
+    out = GlacialEnsemble(_RelaxationModel, params, time, insolation, time_steps=True).run()
+    for n, cols in enumerate(_scalar_columns(_RelaxationModel, params, time, insolation, time_steps=True)):
+        assert np.array_equal(out["state"][n], cols["state"])
+        assert np.allclose(out["x"][n], cols["x"], rtol=0, atol=1e-12)
+
+def test_ensemble_and_forcing_grid_split_batch_settings():
+    '''
+    Members with different batch settings should run as separate batches and come back in member order
+    '''
+    time, insolation = load_orbital("laskar")
+    time, forcing = select_window(time, normalize(f(normalize(insolation))), start=-300)
+    params = [dict(v=0.5, max_substep=s, vmax=vmax) for s in (None, 0.25, None) for vmax in (0.9, 1.1)]
+    out = GlacialEnsemble("ice_volume", params, time, forcing).run()
+    for n, cols in enumerate(_scalar_columns(GlacialIceVolumeModel, params, time, forcing)):
+        assert np.array_equal(out["state"][n], cols["state"])
+        assert np.allclose(out["ice_volume"][n], cols["ice_volume"], rtol=0, atol=1e-12)
+
+    grid = GlacialForcingGrid("ice_volume", params, time, {"a": forcing, "b": -forcing}).run()
+    assert np.allclose(grid["ice_volume"][0], out["ice_volume"], rtol=0, atol=1e-12)
+
+class _ScalarIceVolumeModel(GlacialIceVolumeModel):
+    '''Ice volume model without the batch interface'''
+    @classmethod
+    def supports_batch(cls):
+        return False
+
+def test_forcing_grid_fallback_shares_previous_peaks(monkeypatch):
+    '''
+    Without the batch interface, the forcing grid should run its members on the shared per-forcing previous peaks,
+    without detecting peaks again per member, and match the batch path
+    '''
+    time, insolation = load_orbital("laskar")
+    time, forcing = select_window(time, normalize(f(normalize(insolation))), start=-300)
+    forcings = {"a": forcing, "b": -forcing}
+    params = [dict(v=0.5), dict(state=GlacialState.MILD_GLACIAL, v=0.9, vmax=1.1)]
+    expected = GlacialForcingGrid(GlacialIceVolumeModel, params, time, forcings).run()
+
+    grid = GlacialForcingGrid(_ScalarIceVolumeModel, params, time, forcings)
+    def no_peak_detection(*args, **kwargs):
+        raise AssertionError("peaks detected per member")
+    monkeypatch.setattr("glacial_cycles.simulation.create_peaks_arr", no_peak_detection)
+    monkeypatch.setattr("glacial_cycles.simulation.previous_peak_values", no_peak_detection)
+    result = grid.run()
+    assert np.array_equal(result["state"], expected["state"])
+    assert np.allclose(result["ice_volume"], expected["ice_volume"], rtol=0, atol=1e-12)
+
+def test_model_registry():
+    '''
+    Models should be selectable by name, and unknown names should raise ValueError
+    '''
+    assert get_model("state") is GlacialStateModel
+    assert get_model("ice_volume") is GlacialIceVolumeModel
+    with pytest.raises(ValueError):
+        get_model("no_such_model")
+
+def test_forcing_grid_matches_separate_ensembles():
+    '''
+    A K x N forcing grid should give the same (K, N, T) outputs as one GlacialEnsemble per forcing
+    '''
+    lt, li = load_orbital("laskar")
+    bt, bi = load_orbital("berger")
+    _, li = select_window(lt, li, start=-600)
+    _, bi = select_window(bt, bi, start=-600)
+    time = np.arange(len(li), dtype=float)
+    forcings = {"laskar": li, "berger": bi}
+
+    for model, params in [
+        ("ice_volume", [dict(state=GlacialState.MILD_GLACIAL, v=0.75, vmax=vmax) for vmax in (0.9, 1.0, 1.1)]),
+        ("state", [dict(state=GlacialState.FULL_GLACIAL, i1=i1, i2=i1) for i1 in (-0.08, 0.0)]),
+    ]:
+        grid = GlacialForcingGrid(model, params, time, forcings, normalize_input=True, truncate=1.0 if model == "ice_volume" else None)
+        result = grid.run()
+        assert result["state"].shape == (2, len(params), len(time))
+        for k, (label, x) in enumerate(forcings.items()):
+            x = normalize(x)
+            if model == "ice_volume":
+                x = normalize(f(x))
+            expected = GlacialEnsemble(model, params, time, x).run()
+            for key, val in expected.items():
+                assert np.allclose(result.sel(label)[key], val)
+                assert np.allclose(result[key][k], val)
+
+def test_time_axis_only_sets_step_lengths_on_request():
+    '''
+    By default every step is 1 kyr whatever the time axis (decreasing, or in years); step lengths taken from
+    the time axis require a strictly increasing axis
+    '''
+    time, insolation = load_orbital("laskar")
+    time, forcing = select_window(time, normalize(f(normalize(insolation))), start=-300)
+    params = [dict(v=0.5), dict(state=GlacialState.MILD_GLACIAL, v=0.9)]
+    reference = GlacialEnsemble("ice_volume", params, time, forcing).run()
+    for axis in (-time, 1000 * time):
+        out = GlacialEnsemble("ice_volume", params, axis, forcing).run()
+        assert np.array_equal(out["ice_volume"], reference["ice_volume"])
+        scalar = _scalar_columns(GlacialIceVolumeModel, params[:1], axis, forcing)[0]
+        assert np.array_equal(scalar["ice_volume"], reference["ice_volume"][0])
+    state = _scalar_columns(GlacialStateModel, [dict(tg=33)], 1000 * time, forcing)[0]
+    assert np.array_equal(state["state"], _scalar_columns(GlacialStateModel, [dict(tg=33)], time, forcing)[0]["state"])
+
+    with pytest.raises(ValueError):
+        GlacialEnsemble("ice_volume", params, -time, forcing, time_steps=True).run()
+    with pytest.raises(ValueError):
+        GlacialSimulation(GlacialIceVolumeModel(), -time, forcing, time_steps=True).run()
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from glacial_cycles.store import ResultStore
+from glacial_cycles.models.base import GlacialState
+
+T = 50
+TIME = np.arange(-T + 1, 1, dtype=float)
+
+def _chunk(vmaxs, tg):
+    params = [dict(vmax=v, tg=tg, state=GlacialState.MILD_GLACIAL, state_params=np.zeros((3, 2))) for v in vmaxs]
+    ice = np.array(vmaxs)[:, None] * 100 + tg + np.arange(T) / 1000
+    return params, {"ice_volume": ice, "state": np.ones((len(vmaxs), T), dtype=np.int8)}
+
+def _append(path, vmaxs, tg):
+    return ResultStore(path).append(*_chunk(vmaxs, tg), time=TIME)
+
+def test_store_append_query_read(tmp_path):
+    '''
+    Appended chunks should be queryable by parameter ranges and readable by member and time window
+    '''
+    store = ResultStore(tmp_path / "s")
+    store.append(*_chunk([0.8, 0.9, 1.0], 33), time=TIME)
+    store.append(*_chunk([1.1, 1.2], 20))
+
+    assert len(store) == 5
+    assert sorted(store.params) == ["state", "tg", "vmax"]   # non-scalar params are not indexed
+    ids = store.query(vmax=(0.9, 1.1), tg=33)
+    assert ids.tolist() == [1, 2]
+
+    ice = store.read("ice_volume", ids, window=(-9, 0))
+    assert ice.shape == (2, 10)
+    assert np.allclose(ice[:, 0], [90 + 33 + 0.04, 100 + 33 + 0.04])
+
+    view = store.read("ice_volume", 4)
+    assert isinstance(view, np.memmap) and view[0] == pytest.approx(140)
+    assert isinstance(store.read("state", slice(0, 3)), np.memmap)
+    assert store.read("state").shape == (5, T)
+    assert sum(len(c) for _, c in store.iter_chunks("ice_volume", window=slice(0, 5))) == 5
+
+def test_store_rejects_mismatched_outputs(tmp_path):
+    '''
+    Appends should be rejected when a new store gets no time axis or the outputs don't match the store
+    '''
+    store = ResultStore(tmp_path / "s")
+    params, outputs = _chunk([1.0], 33)
+    with pytest.raises(ValueError):
+        store.append(params, outputs)  # no time axis for a new store
+    store.append(params, outputs, time=TIME)
+    with pytest.raises(ValueError):
+        store.append(params, {"state": outputs["state"]})
+
+def test_store_concurrent_appends(tmp_path):
+    '''
+    Workers appending to the same store concurrently should all end up in the store
+    '''
+    path = tmp_path / "s"
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_append, [path] * 8, [[0.5 + 0.1 * k, 0.55 + 0.1 * k] for k in range(8)], range(8)))
+    store = ResultStore(path)
+    assert len(store) == 16
+    assert sorted(store.params["tg"].tolist()) == sorted(list(range(8)) * 2)
+    for i in store.query(tg=(3, 4)):
+        assert store.read("ice_volume", int(i))[0] == pytest.approx(store.params["vmax"][i] * 100 + store.params["tg"][i])
+
+def test_store_member_indices_stable_across_refresh(tmp_path):
+    '''
+    A chunk committed late with an early-sorting id should be numbered after the members already seen,
+    and negative and empty member selections should be handled like sequences
+    '''
+    store = ResultStore(tmp_path / "s")
+    store.append(*_chunk([0.8, 0.9, 1.0], 33), time=TIME)
+    ids = store.query(vmax=0.9)
+    assert ids.tolist() == [1]
+    late = _append(tmp_path / "s", [1.5], 40)
+    (tmp_path / "s" / "chunks" / late).rename(tmp_path / "s" / "chunks" / ("0" * 20 + "-late"))
+    store.refresh()
+    assert len(store) == 4
+    assert np.array_equal(store.query(vmax=0.9), ids)
+    assert store.read("ice_volume", -1)[0] == pytest.approx(190.0)
+    assert np.array_equal(store.read("ice_volume", [-1, 0])[:, 0], [190.0, 113.0])
+    assert store.read("ice_volume", slice(4, 4)).shape == (0, T)
+    with pytest.raises(IndexError):
+        store.read("ice_volume", 4)
+    assert ResultStore(tmp_path / "s").query(vmax=0.9).tolist() == [2]
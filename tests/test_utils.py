@@ -1,5 +1,5 @@
 import numpy as np
-from glacial_cycles.utils import create_peaks_arr, find_latest_peak_idx
+from glacial_cycles.utils import create_peaks_arr, find_latest_peak_idx, previous_peak_values
 
 def test_create_peak_arr():
     '''
@@ -35,3 +35,17 @@ def test_find_latest_peak_idx():
         assert latest_peak_idx == latest_peak_idx_test
         assert latest_peak_val == latest_peak_val_test
 
+
+def test_previous_peak_values():
+    '''
+    previous_peak_values() should match find_latest_peak_idx() at every time index, with NaN before the first peak
+    '''
+    data = np.array([0.0,0.5,1.0,0.5,0.0, 0.0,0.3,0.6,0.9,0.6,0.3,0.0, 0.0,0.1,0.2,0.1,0.0])
+    peak_ids, _ = create_peaks_arr(data)
+    ipp = previous_peak_values(data)
+    for t in range(len(data)):
+        idx = find_latest_peak_idx(t, peak_ids)
+        if idx is None:
+            assert np.isnan(ipp[t])
+        else:
+            assert ipp[t] == data[idx]